@@ -0,0 +1,224 @@
+import operator
+import os
+import re
+import subprocess
+import sys
+from collections import deque, namedtuple
+from datetime import datetime
+
+from sampler import Sample
+
+# Rule syntax:
+#
+#   cpu > 90 for 30s
+#   avg(net_percent, 1m) > 80 clear 60
+#   rate(rss:postgres, 5m) > 0.5
+#
+# The left side is a metric, avg(metric, window) for a sliding-window
+# mean, or rate(metric, window) for growth per second over the window.
+# "for" requires the condition to hold that long before firing, and
+# "clear" sets the hysteresis threshold at which a firing alert
+# resolves (default: the trigger threshold itself).
+RULE_PATTERN = re.compile(
+    r"^\s*(?:(?P<func>avg|rate)\(\s*(?P<fmetric>[\w:.\-]+)\s*,\s*(?P<window>\d+(?:\.\d+)?[smh]?)\s*\)"
+    r"|(?P<metric>[\w:.\-]+))"
+    r"\s*(?P<op>>=|<=|>|<)\s*(?P<threshold>-?\d+(?:\.\d+)?)"
+    r"(?:\s+for\s+(?P<duration>\d+(?:\.\d+)?[smh]?))?"
+    r"(?:\s+clear\s+(?P<clear>-?\d+(?:\.\d+)?))?\s*$"
+)
+OPERATORS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+UNITS = {"s": 1, "m": 60, "h": 3600}
+
+# Short names for Sample fields
+ALIASES = {"cpu": "cpu_percent", "ram": "ram_percent", "memory": "ram_percent", "net": "net_percent"}
+# Metrics taken from collector.Details when it is available
+DETAIL_METRICS = {
+    "load1": lambda details: details.load_avg[0],
+    "load5": lambda details: details.load_avg[1],
+    "load15": lambda details: details.load_avg[2],
+    "swap_percent": lambda details: details.swap_percent,
+    "processes": lambda details: details.process_count,
+}
+
+Alert = namedtuple("Alert", ["rule", "state", "value", "timestamp"])
+
+
+def parse_duration(text):
+    if text[-1] in UNITS:
+        return float(text[:-1]) * UNITS[text[-1]]
+    return float(text)
+
+
+class WindowMean:
+    # Sliding-window mean with a running sum: O(1) amortized per sample
+    def __init__(self, window):
+        self.window = window
+        self.points = deque()
+        self.total = 0.0
+
+    def update(self, timestamp, value):
+        self.points.append((timestamp, value))
+        self.total += value
+        while self.points[0][0] <= timestamp - self.window:
+            self.total -= self.points.popleft()[1]
+        return self.total / len(self.points)
+
+
+class WindowRate:
+    # Change per second between the oldest and newest point in the window
+    def __init__(self, window):
+        self.window = window
+        self.points = deque()
+
+    def update(self, timestamp, value):
+        self.points.append((timestamp, value))
+        while len(self.points) > 2 and self.points[1][0] <= timestamp - self.window:
+            self.points.popleft()
+        first_time, first_value = self.points[0]
+        if timestamp <= first_time:
+            return 0.0
+        return (value - first_value) / (timestamp - first_time)
+
+
+class Rule:
+    # A compiled rule; update() is O(1) per sample and returns an Alert
+    # when the rule starts firing or resolves, otherwise None
+    def __init__(self, text):
+        match = RULE_PATTERN.match(text)
+        if match is None:
+            raise ValueError(f"cannot parse alert rule: {text!r}")
+        self.text = text.strip()
+        metric = match["fmetric"] or match["metric"]
+        self.metric = ALIASES.get(metric, metric)
+        if self.metric.startswith("rss:"):
+            self.process_name = self.metric[len("rss:"):]
+        elif self.metric in Sample._fields or self.metric in DETAIL_METRICS:
+            self.process_name = None
+        else:
+            raise ValueError(f"unknown metric in alert rule: {metric!r}")
+
+        if match["func"] is not None and parse_duration(match["window"]) <= 0:
+            raise ValueError(f"window must be positive in alert rule: {text!r}")
+        if match["func"] == "avg":
+            self.evaluator = WindowMean(parse_duration(match["window"]))
+        elif match["func"] == "rate":
+            self.evaluator = WindowRate(parse_duration(match["window"]))
+        else:
+            self.evaluator = None
+
+        self.compare = OPERATORS[match["op"]]
+        self.threshold = float(match["threshold"])
+        self.clear = float(match["clear"]) if match["clear"] is not None else self.threshold
+        self.duration = parse_duration(match["duration"]) if match["duration"] else 0.0
+
+        self.since = None
+        self.firing = False
+
+    def update(self, timestamp, value):
+        if self.evaluator is not None:
+            value = self.evaluator.update(timestamp, value)
+
+        if not self.firing:
+            if not self.compare(value, self.threshold):
+                self.since = None
+                return None
+            if self.since is None:
+                self.since = timestamp
+            if timestamp - self.since >= self.duration:
+                self.firing = True
+                return Alert(self, "firing", value, timestamp)
+            return None
+
+        # Firing: resolve only once the value is back past the clear level
+        if self.compare(value, self.clear):
+            return None
+        self.firing = False
+        self.since = None
+        return Alert(self, "resolved", value, timestamp)
+
+
+class AlertEngine:
+    # Evaluates every rule against each sample, using only values the
+    # sampling loop already has (sample, details, process snapshot)
+    def __init__(self, rules, sinks=()):
+        self.rules = [rule if isinstance(rule, Rule) else Rule(rule) for rule in rules]
+        self.sinks = list(sinks)
+        self.process_names = {rule.process_name for rule in self.rules if rule.process_name}
+
+    @property
+    def needs_processes(self):
+        return bool(self.process_names)
+
+    @property
+    def needs_details(self):
+        return any(rule.metric in DETAIL_METRICS for rule in self.rules)
+
+    def process_rss(self, sample, processes):
+        # Total RSS in MB per watched process name, in one pass over the snapshot
+        totals = dict.fromkeys(self.process_names, 0.0)
+        ram_total_mb = sample.ram_total_gb * 1024
+        for proc in processes:
+            if proc.name in totals:
+                totals[proc.name] += proc.memory_percent * ram_total_mb / 100
+        return totals
+
+    def evaluate(self, sample, details=None, processes=None):
+        # An empty snapshot means the registry has not refreshed yet
+        rss = self.process_rss(sample, processes) if processes and self.process_names else None
+        for rule in self.rules:
+            if rule.process_name:
+                if rss is None:
+                    continue
+                value = rss[rule.process_name]
+            elif rule.metric in DETAIL_METRICS:
+                if details is None:
+                    continue
+                value = DETAIL_METRICS[rule.metric](details)
+            else:
+                value = getattr(sample, rule.metric)
+
+            alert = rule.update(sample.timestamp, value)
+            if alert is not None:
+                self.notify(alert)
+
+    def notify(self, alert):
+        # A failing sink must not stop the sampling loop it runs on
+        for sink in self.sinks:
+            try:
+                sink(alert)
+            except Exception as e:
+                print(f"gearsmap: alert sink failed: {e}", file=sys.stderr, flush=True)
+
+
+def format_alert(alert):
+    stamp = datetime.fromtimestamp(alert.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    return f"{stamp} [{alert.state.upper()}] {alert.rule.text} (value {alert.value:.2f})"
+
+
+class LogSink:
+    # The log file is opened up front so a bad path fails at startup
+    def __init__(self, path=None):
+        self.file = open(path, "a", buffering=1) if path is not None else None
+
+    def __call__(self, alert):
+        line = format_alert(alert)
+        if self.file is None:
+            print(f"gearsmap: {line}", file=sys.stderr, flush=True)
+            return
+        self.file.write(line + "\n")
+
+
+class CommandSink:
+    # Runs a shell command per alert without waiting for it; the alert is
+    # passed in GEARSMAP_ALERT_* environment variables
+    def __init__(self, command):
+        self.command = command
+
+    def __call__(self, alert):
+        env = dict(os.environ,
+                   GEARSMAP_ALERT_RULE=alert.rule.text,
+                   GEARSMAP_ALERT_STATE=alert.state,
+                   GEARSMAP_ALERT_VALUE=f"{alert.value:.6g}",
+                   GEARSMAP_ALERT_TIME=f"{alert.timestamp:.3f}")
+        subprocess.Popen(self.command, shell=True, env=env,
+                         stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
@@ -0,0 +1,375 @@
+"""GearsMap benchmarks.
+
+    python benchmarks/run.py                      # everything, JSON on stdout
+    python benchmarks/run.py --only history -o before.json
+    python benchmarks/run.py --compare before.json
+    python benchmarks/run.py --only startup --startup-budget-ms 400
+
+Each result is the per-call time in microseconds (median, p90, min over
+the repeats). Process benchmarks run against a synthetic process table
+through a fake psutil layer, so they do not depend on the host.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+from unittest import mock
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def measure(func, repeat=20, number=1):
+    # Per-call times over `repeat` batches of `number` calls
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        times.append((time.perf_counter_ns() - start) / number / 1000)
+    times.sort()
+    return {
+        "median_us": round(statistics.median(times), 3),
+        "p90_us": round(times[min(len(times) - 1, int(len(times) * 0.9))], 3),
+        "min_us": round(times[0], 3),
+        "repeat": repeat,
+        "number": number,
+    }
+
+
+def bench_sampler(results, quick):
+    import psutil
+    from collector import DetailCollector
+    from sampler import Sampler
+
+    sampler = Sampler()
+    collector = DetailCollector()
+    repeat = 10 if quick else 50
+    results["sampler.sample"] = measure(sampler.sample, repeat)
+    results["sampler.refresh_slow"] = measure(sampler.refresh_slow, repeat)
+    results["collector.collect"] = measure(collector.collect, repeat)
+    results["psutil.pids"] = measure(psutil.pids, repeat)
+
+
+def bench_history(results, quick):
+    from history import MetricHistory
+
+    sizes = (60, 3600) if quick else (60, 3600, 86400)
+    for size in sizes:
+        history = MetricHistory(("cpu", "ram", "network"), size)
+        # Fill up to a day of 1 s samples so the rollup tiers have data
+        filled = 7200 if quick else 86400
+        for i in range(filled):
+            history.append(1.7e9 + i, (i % 100, 50.0, 10.0))
+        counter = iter(range(filled, 10**9))
+        results[f"history.append[{size}]"] = measure(
+            lambda: history.append(1.7e9 + next(counter), (1.0, 2.0, 3.0)), 20, 1000)
+        for span in (60, 3600, 86400):
+            results[f"history.window[{size},{span}s]"] = measure(lambda: history.window(span, 800), 20, 100)
+
+
+def bench_plot(results, quick):
+    # The dashboard's figure on an Agg canvas, so no display is needed
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    from chart import build_figure, envelope_outline
+    from history import MetricHistory
+
+    fig, ax, lines, envelopes = build_figure(60)
+    canvas = FigureCanvasAgg(fig)
+    history = MetricHistory(("cpu", "ram", "network"), 3600)
+    for i in range(7200):
+        history.append(1.7e9 + i, (i % 100, 50.0, 10.0))
+
+    repeat = 5 if quick else 20
+    results["plot.full_draw"] = measure(canvas.draw, repeat)
+    background = canvas.copy_from_bbox(fig.bbox)
+
+    for span in (60, 3600):
+        ax.set_xlim(-span, 0)
+
+        def blit():
+            # What update_plot does per frame; Agg has no screen to blit to
+            canvas.restore_region(background)
+            x, values, _, extremes = history.window(span, int(ax.bbox.width))
+            for column, (line, envelope) in enumerate(zip(lines, envelopes)):
+                line.set_data(x, values[:, column])
+                if extremes is None:
+                    envelope.set_verts([])
+                else:
+                    envelope.set_verts([envelope_outline(x, extremes[0][:, column], extremes[1][:, column])])
+                ax.draw_artist(envelope)
+                ax.draw_artist(line)
+        results[f"plot.blit[{span}s]"] = measure(blit, repeat * 5)
+
+
+MemoryInfo = namedtuple("MemoryInfo", ["rss"])
+IOCounters = namedtuple("IOCounters", ["read_bytes", "write_bytes"])
+
+
+class FakeProcess:
+    # Just enough of psutil.Process for ProcessRegistry.refresh(). Every
+    # call that reads a /proc file on a real host reads a stat-sized
+    # temp file instead, so the fake pays a comparable cost.
+    stat_path = None
+
+    @classmethod
+    def read_proc(cls):
+        with open(cls.stat_path, "rb") as f:
+            return f.read().split()
+
+    def __init__(self, pid, rng):
+        self.pid = pid
+        self._ppid = 1 if pid < 200 else rng.randrange(1, pid)
+        self._name = rng.choice(("python", "bash", "postgres", "nginx", "chrome", "kworker/0:1", "sshd"))
+        self._rss = rng.randrange(1 << 20, 1 << 30)
+        self._read = self._write = 0
+        self.rng = rng
+
+    def is_running(self):
+        # psutil builds a fresh Process, reading /proc/<pid>/stat, and
+        # compares create times
+        return float(self.read_proc()[21]) + 1.7e9 + self.pid == self.create_time()
+
+    def oneshot(self):
+        return contextlib.nullcontext()
+
+    def cpu_percent(self, interval=None):
+        return self.rng.random() * 5
+
+    def memory_info(self):
+        return MemoryInfo(self._rss)
+
+    def io_counters(self):
+        self._read += self.rng.randrange(0, 1 << 16)
+        self._write += self.rng.randrange(0, 1 << 16)
+        return IOCounters(self._read, self._write)
+
+    def create_time(self):
+        return 1.7e9 + self.pid
+
+    def name(self):
+        return self._name
+
+    def status(self):
+        return "sleeping"
+
+    def ppid(self):
+        return self._ppid
+
+    def username(self):
+        # /proc/<pid>/status for the uid
+        self.read_proc()
+        return ("root", "postgres", "www-data")[self.pid % 3]
+
+    def cmdline(self):
+        # /proc/<pid>/cmdline
+        self.read_proc()
+        return [f"/usr/bin/{self._name}", f"--worker={self.pid}"]
+
+
+def fake_cgroup(pid):
+    # /proc/<pid>/cgroup
+    FakeProcess.read_proc()
+    return f"/system.slice/{('nginx', 'postgres', 'user@1000')[pid % 3]}.service"
+
+
+def fake_process(table, pid):
+    # psutil.Process() reads /proc/<pid>/stat for the create time
+    FakeProcess.read_proc()
+    return table[pid]
+
+
+def fake_psutil(count, seed=1):
+    import psutil
+    rng = random.Random(seed)
+    table = {pid: FakeProcess(pid, rng) for pid in range(1, count + 1)}
+    return SimpleNamespace(
+        pids=lambda: list(table),
+        Process=lambda pid: fake_process(table, pid),
+        virtual_memory=lambda: SimpleNamespace(total=16 << 30),
+        NoSuchProcess=psutil.NoSuchProcess,
+        ZombieProcess=psutil.ZombieProcess,
+        AccessDenied=psutil.AccessDenied,
+    )
+
+
+def bench_processes(results, quick):
+    # One stat line stands in for every synthetic process's /proc/<pid>/stat
+    with tempfile.NamedTemporaryFile("w", suffix=".stat", delete=False) as f:
+        f.write("1 (python) S 0 1 1 0 -1 4194560 1 0 0 0 0 0 0 0 20 0 1 0 0 1 1 18446744073709551615 "
+                "1 1 0 0 0 0 0 0 0 0 0 0 17 0 0 0 0 0 0 0 0 0 0 0 0 0 0\n")
+    FakeProcess.stat_path = f.name
+
+    try:
+        for count in ((1000,) if quick else (1000, 10000)):
+            bench_process_table(results, quick, count)
+    finally:
+        os.unlink(f.name)
+
+
+def cold_search(index, query):
+    index.last_query = None
+    return index.search(query)
+
+
+def bench_process_table(results, quick, count):
+    import processes
+    from process_groups import ProcessGroups
+    from process_table import process_items
+
+    # Cgroups are static reads from /proc; keep them off the host too
+    with mock.patch.object(processes, "psutil", fake_psutil(count)), \
+            mock.patch.object(processes, "read_cgroup", fake_cgroup):
+        registry = processes.ProcessRegistry()
+        # Static reads (cmdline, username, cgroup) happen on the first pass only
+        results[f"processes.first_refresh[{count}]"] = measure(
+            lambda: processes.ProcessRegistry().refresh(), 3)
+        registry.refresh()
+        results[f"processes.refresh[{count}]"] = measure(registry.refresh, 5 if quick else 10)
+
+        groups = ProcessGroups()
+        registry.add_listener(groups.update)
+        registry.refresh()
+        results[f"processes.groups_update[{count}]"] = measure(registry.refresh, 5 if quick else 10)
+
+        snapshot = registry.snapshot
+        index = registry.index
+        for sort in ("CPU", "Name"):
+            results[f"table.items[{count},{sort}]"] = measure(lambda: process_items(snapshot, sort), 20)
+        # Cold searches: the index narrows from its previous query otherwise
+        for query in ("post", "p"):
+            results[f"table.search[{count},'{query}']"] = measure(lambda: cold_search(index, query), 20)
+        for mode in ("Tree", "User"):
+            results[f"groups.rows[{count},{mode}]"] = measure(
+                lambda: groups.rows(mode, snapshot, "CPU", set()), 20)
+
+
+def synthetic_tcp_table(count):
+    # /proc/net/tcp text with `count` established sockets
+    lines = ["  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode"]
+    for i in range(count):
+        lines.append(f"{i:4d}: 0100007F:{i % 65536:04X} 0100007F:1F90 01 00000000:00000010 00:00000000 00000000  "
+                     f"1000        0 {100000 + i} 1 0000000000000000 20 4 30 10 -1")
+    return "\n".join(lines) + "\n"
+
+
+def bench_network(results, quick):
+    from netconns import parse_socket_table, tally
+
+    for count in ((10000,) if quick else (10000, 100000)):
+        text = synthetic_tcp_table(count)
+        results[f"netconns.parse[{count}]"] = measure(lambda: parse_socket_table(text), 5)
+        sockets = parse_socket_table(text)
+        # Cached inode -> pid map, 1000 owning processes
+        owners = {inode: inode % 1000 for inode, _, _ in sockets}
+        results[f"netconns.tally[{count}]"] = measure(
+            lambda: tally((owners[inode], state, queued) for inode, state, queued in sockets if inode in owners), 5)
+
+
+def import_time(statement, repeat):
+    # Seconds for `statement` in a fresh interpreter, as the launcher would run it
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeat):
+        output = subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, text=True)
+        times.append(float(output.split()[-1]) * 1e6)
+    times.sort()
+    return {
+        "median_us": round(statistics.median(times), 3),
+        "p90_us": round(times[min(len(times) - 1, int(len(times) * 0.9))], 3),
+        "min_us": round(times[0], 3),
+        "repeat": repeat,
+        "number": 1,
+    }
+
+
+def bench_startup(results, quick):
+    # Everything the GUI imports before its first frame, the headless path,
+    # and the chart module the GUI loads in the background afterwards
+    repeat = 3 if quick else 10
+    results["startup.import_monitor"] = import_time("import monitor", repeat)
+    results["startup.import_headless"] = import_time("import sampler", repeat)
+    results["startup.import_chart"] = import_time("import chart", repeat)
+
+
+BENCHMARKS = {
+    "startup": bench_startup,
+    "sampler": bench_sampler,
+    "history": bench_history,
+    "plot": bench_plot,
+    "processes": bench_processes,
+    "network": bench_network,
+}
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old, new):
+    for name, result in new["results"].items():
+        before = old["results"].get(name)
+        if before is None:
+            print(f"{name:<40}{result['median_us']:>12.1f} us  (new)")
+            continue
+        ratio = result["median_us"] / before["median_us"] if before["median_us"] else float("inf")
+        print(f"{name:<40}{before['median_us']:>12.1f} -> {result['median_us']:>10.1f} us  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="GearsMap benchmarks")
+    parser.add_argument("--only", action="append", choices=sorted(BENCHMARKS),
+                        help="run only this group (repeatable)")
+    parser.add_argument("--quick", action="store_true", help="fewer sizes and repeats")
+    parser.add_argument("-o", "--output", help="write JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="JSON", help="print the change against an earlier run")
+    parser.add_argument("--startup-budget-ms", type=float, default=None,
+                        help="exit with status 1 if importing the GUI takes longer than this")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        BENCHMARKS[name](results, args.quick)
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.time(),
+        "results": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+
+    budget = args.startup_budget_ms
+    startup = results.get("startup.import_monitor")
+    if budget is not None and startup is not None and startup["median_us"] > budget * 1000:
+        print(f"startup regression: importing the GUI took {startup['median_us'] / 1000:.0f} ms "
+              f"(budget {budget:.0f} ms)", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,63 @@
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from matplotlib.collections import PolyCollection
+from matplotlib.figure import Figure
+
+# Imported on first use by the dashboard. Figure is built directly rather
+# than through pyplot, so no backend auto-detection or pyplot state is
+# involved; the Tk canvas below is the only backend the GUI uses.
+
+
+def build_figure(chart_window):
+    # Dashboard chart: returns the figure, its axes, the CPU/RAM/network
+    # lines and a min/max envelope behind each line
+    fig = Figure(figsize=(8, 4), dpi=100)
+    ax = fig.add_subplot()
+    fig.patch.set_facecolor('#2b2b2b')
+    ax.set_facecolor('#2b2b2b')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_color('#666666')
+    ax.spines['left'].set_color('#666666')
+    ax.tick_params(colors='#cccccc')
+    ax.xaxis.label.set_color('#cccccc')
+    ax.yaxis.label.set_color('#cccccc')
+    ax.grid(True, linestyle='--', alpha=0.7, color='#666666')
+
+    # Plot lines for CPU, RAM, and Network
+    # Lines are animated so full redraws leave them out of the cached background
+    cpu_line, = ax.plot([], [], label='CPU', linewidth=2, color='#00a2ff', animated=True)
+    ram_line, = ax.plot([], [], label='RAM', linewidth=2, color='#00ff9d', animated=True)
+    net_line, = ax.plot([], [], label='Network', linewidth=2, color='#ff6e00', animated=True)
+    lines = (cpu_line, ram_line, net_line)
+
+    # Filled between each rollup bucket's minimum and maximum, so spikes
+    # averaged away by a long window still show; empty for raw samples
+    envelopes = []
+    for line in lines:
+        envelope = PolyCollection([], facecolor=line.get_color(), edgecolor='none', alpha=0.25, animated=True)
+        ax.add_collection(envelope, autolim=False)
+        envelopes.append(envelope)
+
+    ax.set_ylim(0, 100)
+    ax.set_xlim(-chart_window, 0)
+    ax.set_xticks([])
+    ax.set_ylabel('Usage %')
+    ax.legend(loc='upper left')
+    return fig, ax, lines, tuple(envelopes)
+
+
+def envelope_outline(x, lows, highs):
+    # Polygon along the highs and back along the lows
+    return np.column_stack([np.concatenate([x, x[::-1]]), np.concatenate([highs, lows[::-1]])])
+
+
+class ProfiledCanvas(FigureCanvasTkAgg):
+    # Times full redraws; blits are timed in update_plot
+    def __init__(self, figure, master, profiler):
+        super().__init__(figure, master=master)
+        self.draw_stage = profiler.stage("ui.plot_draw")
+
+    def draw(self):
+        with self.draw_stage:
+            super().draw()
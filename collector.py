@@ -0,0 +1,127 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+import psutil
+
+from profiling import NULL_PROFILER
+
+# Counter columns kept per NIC and per disk, in array column order
+NIC_FIELDS = ("bytes_sent", "bytes_recv", "packets_sent", "packets_recv")
+DISK_FIELDS = ("read_bytes", "write_bytes", "read_count", "write_count")
+
+# Per-core, per-NIC and per-disk readings from one pass. Rates are per
+# second, one row per entry of the matching *_names tuple.
+Details = namedtuple("Details", [
+    "timestamp",
+    "per_cpu",
+    "nic_names", "nic_rates",
+    "disk_names", "disk_rates",
+    "swap_percent", "swap_used_gb",
+    "load_avg",
+    "process_count",
+])
+
+
+class CounterTable:
+    # Monotonic counters for a set of named devices as one 2-D array, so
+    # turning them into rates is a single vectorized subtraction
+    def __init__(self, fields):
+        self.fields = fields
+        self.names = ()
+        self.index = {}
+        self.columns = None
+        self.values = np.zeros((0, len(fields)))
+
+    def update(self, counters, elapsed):
+        names = tuple(counters)
+        rows = list(counters.values())
+        if rows:
+            if self.columns is None:
+                self.columns = [type(rows[0])._fields.index(field) for field in self.fields]
+            # One C-level conversion of all devices, then pick our columns
+            current = np.array(rows, dtype=np.float64)[:, self.columns]
+        else:
+            current = np.zeros((0, len(self.fields)))
+
+        if names == self.names:
+            previous = self.values
+        else:
+            # Devices came or went: line up the previous readings by name,
+            # new devices start from their current value (rate 0)
+            previous = current.copy()
+            for row, name in enumerate(names):
+                old = self.index.get(name)
+                if old is not None:
+                    previous[row] = self.values[old]
+            self.names = names
+            self.index = {name: row for row, name in enumerate(names)}
+
+        if elapsed > 0:
+            # Counters can wrap or reset (e.g. interface re-created)
+            rates = np.maximum(current - previous, 0) / elapsed
+        else:
+            rates = np.zeros_like(current)
+        self.values = current
+        return rates
+
+
+class DetailCollector:
+    def __init__(self, profiler=NULL_PROFILER):
+        self.profiler = profiler
+        self.nics = CounterTable(NIC_FIELDS)
+        self.disks = CounterTable(DISK_FIELDS)
+
+        # Prime per-CPU percentages and the counter baselines
+        psutil.cpu_percent(percpu=True)
+        self.prev_time = time.monotonic()
+        self.nics.update(psutil.net_io_counters(pernic=True), 0)
+        self.disks.update(psutil.disk_io_counters(perdisk=True) or {}, 0)
+
+    def collect(self):
+        stage = self.profiler.stage
+        with stage("psutil.cpu_percent(percpu)"):
+            per_cpu = np.array(psutil.cpu_percent(percpu=True), dtype=np.float64)
+        with stage("psutil.net_io_counters(pernic)"):
+            net_counters = psutil.net_io_counters(pernic=True)
+        with stage("psutil.disk_io_counters"):
+            disk_counters = psutil.disk_io_counters(perdisk=True) or {}
+        with stage("psutil.swap_memory"):
+            swap = psutil.swap_memory()
+        with stage("psutil.getloadavg"):
+            load_avg = psutil.getloadavg()
+        with stage("psutil.pids"):
+            process_count = len(psutil.pids())
+
+        now = time.monotonic()
+        elapsed = now - self.prev_time
+        self.prev_time = now
+
+        nic_rates = self.nics.update(net_counters, elapsed)
+        disk_rates = self.disks.update(disk_counters, elapsed)
+
+        return Details(
+            time.time(),
+            per_cpu,
+            self.nics.names, nic_rates,
+            self.disks.names, disk_rates,
+            swap.percent, swap.used / (1024**3),
+            load_avg,
+            process_count,
+        )
+
+
+def format_details(details):
+    cores = " ".join(f"{value:.0f}" for value in details.per_cpu)
+    load = " ".join(f"{value:.2f}" for value in details.load_avg)
+    # Busiest NIC and disk by total throughput
+    parts = [f"cores [{cores}]", f"load {load}", f"swap {details.swap_percent:.1f}%"]
+    if len(details.nic_names):
+        row = int(np.argmax(details.nic_rates[:, 0] + details.nic_rates[:, 1]))
+        sent, recv = details.nic_rates[row, :2] / 1024
+        parts.append(f"{details.nic_names[row]} ↑ {sent:.1f} ↓ {recv:.1f} KB/s")
+    if len(details.disk_names):
+        row = int(np.argmax(details.disk_rates[:, 0] + details.disk_rates[:, 1]))
+        read, write = details.disk_rates[row, :2] / 1024
+        parts.append(f"{details.disk_names[row]} R {read:.1f} W {write:.1f} KB/s")
+    return "  ".join(parts)
@@ -0,0 +1,115 @@
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PROMETHEUS_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+OPENMETRICS_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_value(value):
+    # Full precision; Prometheus spells the special values NaN and +Inf/-Inf
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def render_metrics(sample, details=None):
+    # Exposition text for one sample; rendered once, served many times
+    lines = []
+
+    def metric(name, kind, help_text, values):
+        lines.append(f"# HELP gearsmap_{name} {help_text}")
+        lines.append(f"# TYPE gearsmap_{name} {kind}")
+        for labels, value in values:
+            if labels:
+                label_text = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels)
+                lines.append(f"gearsmap_{name}{{{label_text}}} {format_value(value)}")
+            else:
+                lines.append(f"gearsmap_{name} {format_value(value)}")
+
+    metric("cpu_percent", "gauge", "Total CPU utilisation in percent.", [((), sample.cpu_percent)])
+    if not math.isnan(sample.cpu_freq_mhz):
+        metric("cpu_frequency_mhz", "gauge", "Current CPU frequency in MHz.", [((), sample.cpu_freq_mhz)])
+    metric("memory_percent", "gauge", "Memory utilisation in percent.", [((), sample.ram_percent)])
+    metric("memory_used_bytes", "gauge", "Used memory in bytes.", [((), sample.ram_used_gb * 1024**3)])
+    metric("memory_total_bytes", "gauge", "Total memory in bytes.", [((), sample.ram_total_gb * 1024**3)])
+    metric("network_receive_bytes_per_second", "gauge", "Received bytes per second, all interfaces.",
+           [((), sample.recv_kb_s * 1024)])
+    metric("network_transmit_bytes_per_second", "gauge", "Sent bytes per second, all interfaces.",
+           [((), sample.sent_kb_s * 1024)])
+    metric("uptime_seconds", "gauge", "Seconds since boot.", [((), sample.uptime_seconds)])
+
+    if details is not None:
+        metric("processes", "gauge", "Number of processes.", [((), details.process_count)])
+        metric("cpu_core_percent", "gauge", "Per-core CPU utilisation in percent.",
+               [((("core", core),), value) for core, value in enumerate(details.per_cpu)])
+        metric("load_average", "gauge", "System load average.",
+               [((("period", period),), value) for period, value in zip(("1m", "5m", "15m"), details.load_avg)])
+        metric("swap_percent", "gauge", "Swap utilisation in percent.", [((), details.swap_percent)])
+        metric("interface_receive_bytes_per_second", "gauge", "Received bytes per second per interface.",
+               [((("interface", name),), rates[1]) for name, rates in zip(details.nic_names, details.nic_rates)])
+        metric("interface_transmit_bytes_per_second", "gauge", "Sent bytes per second per interface.",
+               [((("interface", name),), rates[0]) for name, rates in zip(details.nic_names, details.nic_rates)])
+        metric("disk_read_bytes_per_second", "gauge", "Bytes read per second per disk.",
+               [((("disk", name),), rates[0]) for name, rates in zip(details.disk_names, details.disk_rates)])
+        metric("disk_write_bytes_per_second", "gauge", "Bytes written per second per disk.",
+               [((("disk", name),), rates[1]) for name, rates in zip(details.disk_names, details.disk_rates)])
+
+    return "\n".join(lines) + "\n"
+
+
+class MetricsExporter:
+    # Local HTTP /metrics endpoint. update() is called from the sampling
+    # loop and swaps in pre-encoded bodies; request handlers only read
+    # them, so scrapes never trigger a psutil call or any formatting.
+    def __init__(self, host="127.0.0.1", port=9105):
+        self.prometheus_body = b""
+        self.openmetrics_body = b"# EOF\n"
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                if "application/openmetrics-text" in self.headers.get("Accept", ""):
+                    body, content_type = exporter.openmetrics_body, OPENMETRICS_TYPE
+                else:
+                    body, content_type = exporter.prometheus_body, PROMETHEUS_TYPE
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.server.server_address
+
+    def update(self, sample, details=None):
+        text = render_metrics(sample, details)
+        # Two attribute assignments; a scrape sees either the old or the new body
+        self.prometheus_body = text.encode()
+        self.openmetrics_body = (text + "# EOF\n").encode()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
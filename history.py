@@ -0,0 +1,173 @@
+import threading
+
+import numpy as np
+
+# Rollup tiers: bucket size in seconds and number of buckets kept
+# (1 hour of 1s, 1 day of 10s, 1 week of 1m and 30 days of 10m buckets)
+ROLLUP_TIERS = ((1, 3600), (10, 8640), (60, 10080), (600, 4320))
+
+
+class RingBuffer:
+    # Fixed-size history backed by a preallocated array.
+    #
+    # Every value is written twice, at i and i + capacity, so the most
+    # recent `capacity` values are always one contiguous slice. append()
+    # is O(1) regardless of capacity and view() never copies. With `width`
+    # each entry is a row of that many values.
+    def __init__(self, capacity, dtype=np.float64, fill=0, width=None):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        shape = 2 * capacity if width is None else (2 * capacity, width)
+        self._data = np.full(shape, fill, dtype=dtype)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, value):
+        self._data[self._head] = value
+        self._data[self._head + self.capacity] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+
+    def view(self, n=None):
+        # Read-only view of the last n values (default: whole window), oldest first
+        if n is None or n > self.capacity:
+            n = self.capacity
+        end = self._head + self.capacity
+        window = self._data[end - n:end]
+        window.flags.writeable = False
+        return window
+
+    def last(self):
+        return self._data[self._head + self.capacity - 1]
+
+    def clear(self, fill=0):
+        self._data.fill(fill)
+        self._head = 0
+        self._count = 0
+
+
+class RollupTier:
+    # min/max/mean of every metric per fixed time bucket, built incrementally
+    def __init__(self, seconds, capacity, width):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.times = RingBuffer(capacity, fill=np.nan)
+        self.mean = RingBuffer(capacity, fill=np.nan, width=width)
+        self.min = RingBuffer(capacity, fill=np.nan, width=width)
+        self.max = RingBuffer(capacity, fill=np.nan, width=width)
+
+        # Accumulators for the bucket currently being filled
+        self.bucket = None
+        self.count = 0
+        self.sums = np.zeros(width)
+        self.mins = np.full(width, np.inf)
+        self.maxs = np.full(width, -np.inf)
+        self.latest = None
+
+    def add(self, timestamp, values):
+        bucket = int(timestamp // self.seconds)
+        if bucket != self.bucket:
+            self.close_bucket()
+            self.bucket = bucket
+        self.sums += values
+        np.minimum(self.mins, values, out=self.mins)
+        np.maximum(self.maxs, values, out=self.maxs)
+        self.count += 1
+        self.latest = timestamp
+
+    def close_bucket(self):
+        if self.count:
+            self.times.append(self.bucket * self.seconds)
+            self.mean.append(self.sums / self.count)
+            self.min.append(self.mins)
+            self.max.append(self.maxs)
+        self.count = 0
+        self.sums.fill(0)
+        self.mins.fill(np.inf)
+        self.maxs.fill(-np.inf)
+
+    def covers(self, span):
+        return len(self.times) < self.capacity or self.capacity * self.seconds >= span
+
+    def first_after(self, since):
+        # Index of the first closed bucket that ends after `since`
+        return int(np.searchsorted(self.times.view(len(self.times)), since - self.seconds, side="right"))
+
+    def populated(self, since):
+        # Buckets holding data after `since`, including the open bucket
+        return len(self.times) - self.first_after(since) + (1 if self.count else 0)
+
+    def window(self, since):
+        # Buckets with data after `since`. Closed buckets sit at their
+        # midpoint and the open one at its newest sample, so the line
+        # reaches the right edge of the chart. Returns times and the
+        # per-bucket means, minimums and maximums.
+        first = self.first_after(since)
+        n = len(self.times)
+        times = self.times.view(n)[first:] + self.seconds / 2
+        means, mins, maxs = (ring.view(n)[first:] for ring in (self.mean, self.min, self.max))
+        if self.count:
+            times = np.append(times, self.latest)
+            means = np.vstack([means, self.sums / self.count])
+            mins = np.vstack([mins, self.mins])
+            maxs = np.vstack([maxs, self.maxs])
+        return times, means, mins, maxs
+
+
+class MetricHistory:
+    # Raw samples for several metrics in one ring buffer, plus rollup tiers
+    # so any visible window can be drawn with at most ~pixel-width points
+    def __init__(self, names, capacity, tiers=ROLLUP_TIERS):
+        self.names = tuple(names)
+        self.times = RingBuffer(capacity, fill=np.nan)
+        self.raw = RingBuffer(capacity, width=len(self.names))
+        self.tiers = [RollupTier(seconds, size, len(self.names)) for seconds, size in tiers]
+        self.version = 0
+        # append() runs on a sampling thread while window() is read from
+        # the UI thread
+        self.lock = threading.Lock()
+
+    def append(self, timestamp, values):
+        values = np.asarray(values, dtype=np.float64)
+        with self.lock:
+            self.times.append(timestamp)
+            self.raw.append(values)
+            for tier in self.tiers:
+                tier.add(timestamp, values)
+            self.version += 1
+
+    def series(self, name, n=None):
+        # Zero-copy view of one metric's raw history
+        return self.raw.view(n)[:, self.names.index(name)]
+
+    def window(self, span, pixels):
+        # Pick the finest resolution that covers `span` seconds in at most
+        # `pixels` points. Returns (seconds relative to the newest sample,
+        # values with one column per metric, bucket seconds or 0 for raw,
+        # and for a tier the per-bucket (minimums, maximums) so short spikes
+        # stay visible; None for raw samples). The arrays are copies taken
+        # under the lock, so later appends never change them.
+        with self.lock:
+            count = len(self.times)
+            if count == 0:
+                return np.empty(0), np.empty((0, len(self.names))), 0, None
+            times = self.times.view(count)
+            now = times[-1]
+
+            start = np.searchsorted(times, now - span)
+            raw_covers = count < self.times.capacity or start > 0
+            if raw_covers and count - start <= pixels:
+                return times[start:] - now, self.raw.view(count)[start:].copy(), 0, None
+
+            # Judge each tier by the buckets it actually holds in the span, so a
+            # long span over a short history still uses the finest tier
+            for tier in self.tiers:
+                if tier.covers(span) and tier.populated(now - span) <= pixels:
+                    break
+            times, values, mins, maxs = tier.window(now - span)
+            return times - now, values.copy(), tier.seconds, (mins.copy(), maxs.copy())
@@ -0,0 +1,827 @@
+import psutil
+import customtkinter as ctk
+import importlib
+import threading
+import time
+import subprocess
+import platform
+import queue
+import sys
+from datetime import datetime
+
+from collector import DetailCollector
+from history import MetricHistory
+from processes import ProcessRegistry
+from profiling import Profiler
+from sampler import SLOW_INTERVAL, Sampler, format_freq, format_rate, format_uptime
+from scheduler import Mailbox, Scheduler
+
+# Set appearance mode and default color theme for customtkinter
+ctk.set_appearance_mode("System")  # Modes: "System" (standard), "Dark", "Light"
+ctk.set_default_color_theme("blue")  # Themes: "blue" (standard), "green", "dark-blue"
+
+# Visible chart window choices, in seconds
+CHART_WINDOWS = {"1 min": 60, "10 min": 600, "1 hour": 3600, "1 day": 86400}
+
+# How often the Tk main loop picks up the latest sample (display rate)
+UI_FRAME_MS = 100
+
+# Share of the main thread the chart may spend redrawing (0.05 = 5%)
+PLOT_CPU_BUDGET = 0.05
+
+# How often the stats panel refreshes while shown
+STATS_PANEL_MS = 1000
+
+# How often to check whether matplotlib has finished loading
+CHART_POLL_MS = 50
+
+# Replay speed choices, as multiples of real time
+REPLAY_SPEEDS = {"0.5x": 0.5, "1x": 1.0, "2x": 2.0, "10x": 10.0, "60x": 60.0, "600x": 600.0, "3600x": 3600.0}
+
+class SystemMonitor(ctk.CTk):
+    def __init__(self, refresh_rate=1.0, history_points=60, recorder=None, exporter=None, aggregator=None,
+                 alert_engine=None, profile=False, started=None, replayer=None):
+        super().__init__()
+
+        # Configure window
+        self.title("System Resource Monitor")
+        self.geometry("900x600")
+        self.protocol("WM_DELETE_WINDOW", self.on_closing)
+        
+        # Data history: raw samples plus 1s/10s/1m/10m rollups
+        self.max_data_points = history_points
+        self.history = MetricHistory(("cpu", "ram", "network"), self.max_data_points)
+        self.chart_window = CHART_WINDOWS["1 min"]
+        
+        # Stage timings for the stats panel, and dumped at exit with --profile
+        self.profiler = Profiler()
+        self.profile = profile
+        # perf_counter() at launch, for the time-to-first-frame measurement
+        self.started = started
+        
+        # Recorded samples played back instead of live sampling
+        self.replayer = replayer
+        self.pending_seek = None
+        if self.replayer is not None:
+            self.title("System Resource Monitor - Replay")
+        
+        # Sampling engine shared with headless mode
+        self.sampler = Sampler(self.profiler)
+        self.detail_collector = DetailCollector(self.profiler)
+        self.recorder = recorder
+        self.exporter = exporter
+        
+        # Remote agents followed by this dashboard; None selects the local host
+        self.aggregator = aggregator
+        self.selected_host = None
+        self.host_labels = {}
+        
+        # Process registry, sampled in the background while a process window is open
+        self.process_registry = ProcessRegistry(profiler=self.profiler)
+        self.process_windows = 0
+        
+        # Alert rules evaluated on every sample, with an on-screen notification
+        # sink; alerts queue up for the main loop, none may be dropped
+        self.alert_engine = alert_engine
+        self.alerts = queue.SimpleQueue()
+        if self.alert_engine is not None:
+            self.alert_engine.sinks.append(self.notify_alert)
+            if self.alert_engine.needs_processes:
+                self.process_registry.start()
+        
+        # Create sidebar frame
+        self.sidebar_frame = ctk.CTkFrame(self, width=200, corner_radius=0)
+        self.sidebar_frame.pack(side=ctk.LEFT, fill=ctk.Y, padx=0, pady=0)
+
+        # Logo and title
+        self.logo_label = ctk.CTkLabel(self.sidebar_frame, text="System Monitor", font=ctk.CTkFont(size=20, weight="bold"))
+        self.logo_label.pack(padx=20, pady=(20, 10))
+        
+        # System info
+        self.system_info_frame = ctk.CTkFrame(self.sidebar_frame)
+        self.system_info_frame.pack(padx=20, pady=10, fill="x")
+        
+        self.hostname_label = ctk.CTkLabel(self.system_info_frame, text=f"Host: {platform.node()}")
+        self.hostname_label.pack(anchor="w", padx=10, pady=2)
+        
+        self.os_label = ctk.CTkLabel(self.system_info_frame, text=f"OS: {platform.system()} {platform.release()}")
+        self.os_label.pack(anchor="w", padx=10, pady=2)
+        
+        self.uptime_label = ctk.CTkLabel(self.system_info_frame, text="Uptime: Calculating...")
+        self.uptime_label.pack(anchor="w", padx=10, pady=2)
+        
+        self.load_label = ctk.CTkLabel(self.system_info_frame, text="Load: -")
+        self.load_label.pack(anchor="w", padx=10, pady=2)
+        
+        self.swap_label = ctk.CTkLabel(self.system_info_frame, text="Swap: -")
+        self.swap_label.pack(anchor="w", padx=10, pady=2)
+        
+        self.disk_label = ctk.CTkLabel(self.system_info_frame, text="Disk: -")
+        self.disk_label.pack(anchor="w", padx=10, pady=2)
+        
+        self.time_label = ctk.CTkLabel(self.sidebar_frame, text="")
+        self.time_label.pack(padx=20, pady=10)
+        
+        # Mode switch
+        self.appearance_mode_label = ctk.CTkLabel(self.sidebar_frame, text="Appearance Mode:", anchor="w")
+        self.appearance_mode_label.pack(padx=20, pady=(10, 0))
+        self.appearance_mode_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=["Light", "Dark", "System"],
+                                                     command=self.change_appearance_mode)
+        self.appearance_mode_menu.pack(padx=20, pady=(10, 10))
+        self.appearance_mode_menu.set("System")
+        
+        # Refresh rate control
+        self.refresh_label = ctk.CTkLabel(self.sidebar_frame, text="Refresh Rate:", anchor="w")
+        self.refresh_label.pack(padx=20, pady=(10, 0))
+        self.refresh_slider = ctk.CTkSlider(self.sidebar_frame, from_=0.5, to=5.0, number_of_steps=9,
+                                          command=self.change_refresh_rate)
+        self.refresh_slider.pack(padx=20, pady=(10, 0))
+        self.refresh_slider.set(refresh_rate)
+        self.refresh_rate_label = ctk.CTkLabel(self.sidebar_frame, text=f"{refresh_rate:.1f} seconds")
+        self.refresh_rate_label.pack(padx=20, pady=(5, 10))
+        
+        # Visible chart window
+        self.chart_window_label = ctk.CTkLabel(self.sidebar_frame, text="Chart Window:", anchor="w")
+        self.chart_window_label.pack(padx=20, pady=(10, 0))
+        self.chart_window_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=list(CHART_WINDOWS),
+                                                  command=self.change_chart_window)
+        self.chart_window_menu.pack(padx=20, pady=(10, 10))
+        self.chart_window_menu.set("1 min")
+        
+        # Host selector, only when following remote agents
+        if self.aggregator is not None:
+            self.host_label = ctk.CTkLabel(self.sidebar_frame, text="Host:", anchor="w")
+            self.host_label.pack(padx=20, pady=(10, 0))
+            self.host_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=["local"], command=self.change_host)
+            self.host_menu.pack(padx=20, pady=(10, 10))
+            self.host_menu.set("local")
+        
+        # Replay controls: play/pause, speed and a seek slider over the recording
+        if self.replayer is not None:
+            self.replay_label = ctk.CTkLabel(self.sidebar_frame, text="Replay:", anchor="w")
+            self.replay_label.pack(padx=20, pady=(10, 0))
+            self.replay_button = ctk.CTkButton(self.sidebar_frame, text="Pause", command=self.toggle_replay)
+            self.replay_button.pack(padx=20, pady=(10, 0))
+            self.replay_speed_menu = ctk.CTkOptionMenu(self.sidebar_frame, values=list(REPLAY_SPEEDS),
+                                                      command=self.change_replay_speed)
+            self.replay_speed_menu.pack(padx=20, pady=(10, 0))
+            self.replay_speed_menu.set(next((name for name, speed in REPLAY_SPEEDS.items()
+                                             if speed == self.replayer.speed), "1x"))
+            self.replay_slider = ctk.CTkSlider(self.sidebar_frame, from_=0, to=1, command=self.seek_replay)
+            self.replay_slider.pack(padx=20, pady=(10, 10))
+            self.replay_slider.set(0)
+        
+        # Create button to take screenshot
+        self.screenshot_button = ctk.CTkButton(self.sidebar_frame, text="Take Screenshot", command=self.take_screenshot)
+        self.screenshot_button.pack(padx=20, pady=10)
+        
+        # Create button to process list
+        self.process_button = ctk.CTkButton(self.sidebar_frame, text="Process List", command=self.open_process_window)
+        self.process_button.pack(padx=20, pady=10)
+        
+        # Toggle for the monitor's own timing stats
+        self.stats_switch = ctk.CTkSwitch(self.sidebar_frame, text="Show Stats", command=self.toggle_stats)
+        self.stats_switch.pack(padx=20, pady=10)
+        
+        # Create main frame for charts
+        self.main_frame = ctk.CTkFrame(self)
+        self.main_frame.pack(side=ctk.LEFT, fill=ctk.BOTH, expand=True, padx=20, pady=20)
+        
+        # Create resource info cards at top
+        self.info_frame = ctk.CTkFrame(self.main_frame)
+        self.info_frame.pack(fill="x", pady=(0, 20))
+        
+        # CPU info card
+        self.cpu_info_frame = ctk.CTkFrame(self.info_frame)
+        self.cpu_info_frame.pack(side=ctk.LEFT, fill="both", expand=True, padx=(0, 10))
+        
+        self.cpu_title = ctk.CTkLabel(self.cpu_info_frame, text="CPU", font=ctk.CTkFont(size=16, weight="bold"))
+        self.cpu_title.pack(padx=10, pady=(10, 5))
+        
+        self.cpu_usage = ctk.CTkLabel(self.cpu_info_frame, text="0%", font=ctk.CTkFont(size=24))
+        self.cpu_usage.pack(padx=10, pady=5)
+        
+        self.cpu_freq = ctk.CTkLabel(self.cpu_info_frame, text="0 MHz")
+        self.cpu_freq.pack(padx=10, pady=(0, 10))
+        
+        # RAM info card
+        self.ram_info_frame = ctk.CTkFrame(self.info_frame)
+        self.ram_info_frame.pack(side=ctk.LEFT, fill="both", expand=True, padx=10)
+        
+        self.ram_title = ctk.CTkLabel(self.ram_info_frame, text="Memory", font=ctk.CTkFont(size=16, weight="bold"))
+        self.ram_title.pack(padx=10, pady=(10, 5))
+        
+        self.ram_usage = ctk.CTkLabel(self.ram_info_frame, text="0%", font=ctk.CTkFont(size=24))
+        self.ram_usage.pack(padx=10, pady=5)
+        
+        self.ram_details = ctk.CTkLabel(self.ram_info_frame, text="0/0 GB")
+        self.ram_details.pack(padx=10, pady=(0, 10))
+        
+        # Network info card
+        self.net_info_frame = ctk.CTkFrame(self.info_frame)
+        self.net_info_frame.pack(side=ctk.LEFT, fill="both", expand=True, padx=(10, 0))
+        
+        self.net_title = ctk.CTkLabel(self.net_info_frame, text="Network", font=ctk.CTkFont(size=16, weight="bold"))
+        self.net_title.pack(padx=10, pady=(10, 5))
+        
+        self.net_usage = ctk.CTkLabel(self.net_info_frame, text="0 KB/s", font=ctk.CTkFont(size=24))
+        self.net_usage.pack(padx=10, pady=5)
+        
+        self.net_details = ctk.CTkLabel(self.net_info_frame, text="↑ 0 KB/s  ↓ 0 KB/s")
+        self.net_details.pack(padx=10, pady=(0, 10))
+        
+        # Create chart frame
+        self.chart_frame = ctk.CTkFrame(self.main_frame)
+        self.chart_frame.pack(fill="both", expand=True)
+        
+        # The chart is built once matplotlib has loaded in the background,
+        # so the cards show up without waiting for it
+        self.fig = self.ax = self.canvas = None
+        self.plot_lines = ()
+        self.plot_envelopes = ()
+        self.chart_loader = threading.Thread(target=importlib.import_module, args=("chart",), daemon=True)
+        self.chart_loader.start()
+        
+        # Stats panel, packed below the chart while the switch is on
+        self.stats_label = ctk.CTkLabel(self.main_frame, text="", justify="left", anchor="w",
+                                        font=ctk.CTkFont(family="Courier", size=11))
+        self.stats_job = None
+        
+        # Blitting state: static background (spines, grid, legend) is cached on
+        # every full draw and only the three lines are redrawn per sample
+        self.plot_background = None
+        self.plotted_version = -1
+        self.frame_time = 0.0
+        self.next_frame_at = 0.0
+        self.plot_pending = False
+        
+        # Latest-sample handoff from the sampler thread to the Tk main loop,
+        # and the same for the sampler's missed-deadline count
+        self.mailbox = Mailbox()
+        self.missed_mailbox = Mailbox()
+        self.label_texts = {}
+        
+        # Set refresh rate and start monitoring thread: a drift-free
+        # scheduler with a fast sample task and a slow frequency task
+        self.refresh_rate = refresh_rate
+        self.scheduler = Scheduler(on_missed=self.on_missed_deadline)
+        self.sample_task = self.scheduler.add("sample", self.refresh_rate, self.update_data)
+        self.scheduler.add("slow", SLOW_INTERVAL, self.sampler.refresh_slow)
+        self.update_thread = threading.Thread(target=self.scheduler.run)
+        self.update_thread.daemon = True
+        if self.replayer is None:
+            self.update_thread.start()
+        else:
+            # Replayed samples reach the mailbox from the main loop instead
+            self.after(UI_FRAME_MS, self.replay_tick)
+        
+        # Update time once
+        self.update_time()
+        
+        # Start draining samples at display rate
+        self.after(UI_FRAME_MS, self.drain_mailbox)
+        self.after(CHART_POLL_MS, self.build_chart)
+
+    def update_data(self):
+        # One sampling tick, run by the scheduler every refresh_rate seconds
+        stage = self.profiler.stage
+        with stage("tick"):
+            sample = self.sampler.sample()
+            if self.recorder is not None:
+                with stage("tick.record"):
+                    self.recorder.append(sample)
+            
+            # Update data history
+            with stage("tick.history"):
+                self.history.append(sample.timestamp, (sample.cpu_percent, sample.ram_percent, sample.net_percent))
+            
+            # Per-core, per-NIC and per-disk details in one batched pass
+            details = self.detail_collector.collect()
+            if self.exporter is not None:
+                with stage("tick.exporter"):
+                    self.exporter.update(sample, details)
+            if self.alert_engine is not None:
+                with stage("tick.alerts"):
+                    processes = self.process_registry.snapshot if self.alert_engine.needs_processes else None
+                    self.alert_engine.evaluate(sample, details, processes)
+        
+        # Hand the sample to the main loop; an unread older one is dropped
+        self.mailbox.put((sample, details))
+    
+    def current_history(self):
+        if self.selected_host is None:
+            return self.history
+        return self.selected_host.history
+    
+    def change_host(self, label):
+        self.selected_host = self.host_labels.get(label)
+        if self.selected_host is None:
+            self.set_text(self.hostname_label, f"Host: {platform.node()}")
+            self.set_text(self.os_label, f"OS: {platform.system()} {platform.release()}")
+        else:
+            self.set_text(self.hostname_label, self.remote_host_text(self.selected_host))
+            # Agents send no details; blank the local ones rather than show
+            # them next to a remote host. The next local frame refills them.
+            self.set_text(self.os_label, "OS: -")
+            self.set_text(self.load_label, "Load: -")
+            self.set_text(self.swap_label, "Swap: -")
+            self.set_text(self.disk_label, "Disk: -")
+            # Show the remote host's last sample right away
+            if self.selected_host.latest is not None:
+                self.selected_host.mailbox.put((self.selected_host.latest, None))
+        # Different history: redraw the chart from scratch
+        self.plotted_version = -1
+        if self.canvas is not None:
+            self.canvas.draw_idle()
+    
+    def remote_host_text(self, host):
+        return f"Host: {host.hostname or host.endpoint} ({format_rate(host.receive_rate() / 1024)} in)"
+    
+    def refresh_host_menu(self):
+        # Remote hostnames become known once each agent says hello, and
+        # labels mark agents that are down
+        labels = {host.label: host for host in self.aggregator.hosts.values()}
+        if labels.keys() != self.host_labels.keys():
+            self.host_labels = labels
+            self.host_menu.configure(values=["local"] + list(labels))
+            if self.selected_host is not None:
+                self.host_menu.set(self.selected_host.label)
+        if self.selected_host is not None:
+            self.set_text(self.hostname_label, self.remote_host_text(self.selected_host))
+    
+    def drain_mailbox(self):
+        # Runs on the main loop at UI_FRAME_MS; only the newest sample is shown
+        if self.aggregator is not None:
+            self.refresh_host_menu()
+        mailbox = self.mailbox if self.selected_host is None else self.selected_host.mailbox
+        missed = self.missed_mailbox.take()
+        if missed is not None:
+            self.set_text(self.refresh_rate_label, f"{self.refresh_rate:.1f} seconds ({missed} missed)")
+        while not self.alerts.empty():
+            self.show_alert(self.alerts.get())
+        frame = mailbox.take()
+        if frame is not None:
+            sample, details = frame
+            with self.profiler.stage("ui.update_ui"):
+                self.update_ui(
+                    sample.cpu_percent, format_freq(sample.cpu_freq_mhz),
+                    sample.ram_percent, sample.ram_used_gb, sample.ram_total_gb,
+                    sample.recv_kb_s, sample.sent_kb_s, sample.total_kb_s,
+                    f"Uptime: {format_uptime(sample.uptime_seconds)}"
+                )
+                if details is not None:
+                    self.update_details(details)
+            self.mark_startup("startup.first_frame")
+            
+            # Update plot unless a deferred frame is already queued
+            if not self.plot_pending:
+                self.update_plot()
+        self.after(UI_FRAME_MS, self.drain_mailbox)
+    
+    def set_text(self, label, text):
+        # Reconfigure a label only when its formatted text actually changes
+        if self.label_texts.get(label) != text:
+            self.label_texts[label] = text
+            label.configure(text=text)
+    
+    def on_missed_deadline(self, task, missed):
+        # Scheduler thread: drain_mailbox shows the count on the main loop
+        if task is self.sample_task:
+            self.missed_mailbox.put(task.missed)
+    
+    def update_ui(self, cpu_percent, freq_text, ram_percent, ram_used_gb, ram_total_gb, 
+                 recv_kb_s, sent_kb_s, total_kb_s, uptime_str):
+        # Update CPU info
+        self.set_text(self.cpu_usage, f"{cpu_percent:.1f}%")
+        self.set_text(self.cpu_freq, freq_text)
+        
+        # Update RAM info
+        self.set_text(self.ram_usage, f"{ram_percent:.1f}%")
+        self.set_text(self.ram_details, f"{ram_used_gb:.1f}/{ram_total_gb:.1f} GB")
+        
+        # Update Network info
+        self.set_text(self.net_usage, format_rate(total_kb_s))
+        self.set_text(self.net_details, f"↑ {format_rate(sent_kb_s)}  ↓ {format_rate(recv_kb_s)}")
+        
+        # Update uptime (the clock keeps its own once-a-second timer)
+        self.set_text(self.uptime_label, uptime_str)
+        
+    def update_details(self, details):
+        self.set_text(self.load_label, "Load: " + " ".join(f"{value:.2f}" for value in details.load_avg))
+        self.set_text(self.swap_label, f"Swap: {details.swap_percent:.1f}% ({details.swap_used_gb:.1f} GB)")
+        
+        # Busiest disk (perdisk counters include partitions, so totals would double count)
+        if len(details.disk_names):
+            row = int(details.disk_rates[:, :2].sum(axis=1).argmax())
+            read_kb_s, write_kb_s = details.disk_rates[row, :2] / 1024
+            self.set_text(self.disk_label, f"Disk {details.disk_names[row]}: R {format_rate(read_kb_s)}  W {format_rate(write_kb_s)}")
+        
+    def update_time(self):
+        # Replays show the recorded time being played
+        now = datetime.now() if self.replayer is None else datetime.fromtimestamp(self.replayer.current_position())
+        current_time = now.strftime("%H:%M:%S")
+        current_date = now.strftime("%Y-%m-%d")
+        self.time_label.configure(text=f"{current_date}\n{current_time}")
+        # Update time every second
+        self.after(1000, self.update_time)
+        
+    def replay_tick(self):
+        # Feed every recorded sample that is now due through the live path:
+        # history for the chart, the newest one to the mailbox for the cards
+        replayer = self.replayer
+        latest = None
+        for sample in replayer.due():
+            self.history.append(sample.timestamp, (sample.cpu_percent, sample.ram_percent, sample.net_percent))
+            latest = sample
+        if latest is not None:
+            self.mailbox.put((latest, None))
+        span = replayer.last - replayer.first
+        if span > 0 and self.pending_seek is None:
+            self.replay_slider.set((replayer.position - replayer.first) / span)
+        self.set_text(self.replay_button, "Pause" if replayer.playing else "Play")
+        self.after(UI_FRAME_MS, self.replay_tick)
+    
+    def toggle_replay(self):
+        if self.replayer.playing:
+            self.replayer.pause()
+            return
+        if self.replayer.pending is None:
+            # Finished: start over with a fresh history, as a seek does,
+            # so timestamps never go backwards inside it
+            self.run_seek(0)
+        self.replayer.play()
+    
+    def change_replay_speed(self, choice):
+        self.replayer.set_speed(REPLAY_SPEEDS[choice])
+    
+    def seek_replay(self, value):
+        # Coalesce slider drags; each seek refills the chart window
+        if self.pending_seek is not None:
+            self.after_cancel(self.pending_seek)
+        self.pending_seek = self.after(150, lambda: self.run_seek(value))
+    
+    def run_seek(self, value):
+        self.pending_seek = None
+        replayer = self.replayer
+        replayer.seek(replayer.first + value * (replayer.last - replayer.first))
+        self.history = MetricHistory(self.history.names, self.max_data_points)
+        for sample in replayer.before(self.chart_window):
+            self.history.append(sample.timestamp, (sample.cpu_percent, sample.ram_percent, sample.net_percent))
+        self.plotted_version = -1
+    
+    def build_chart(self):
+        if self.chart_loader.is_alive():
+            self.after(CHART_POLL_MS, self.build_chart)
+            return
+        from chart import ProfiledCanvas, build_figure
+        
+        self.fig, self.ax, self.plot_lines, self.plot_envelopes = build_figure(self.chart_window)
+        self.canvas = ProfiledCanvas(self.fig, self.chart_frame, self.profiler)
+        self.canvas.get_tk_widget().pack(fill=ctk.BOTH, expand=True)
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
+        self.mark_startup("startup.chart")
+        
+    def mark_startup(self, name):
+        # Time from launch to a startup milestone, recorded once
+        if self.started is not None and name not in self.profiler.stages:
+            self.profiler.record(name, time.perf_counter() - self.started)
+        
+    def on_canvas_draw(self, event):
+        # Full redraw (startup, resize, theme change): re-cache the background
+        self.plot_background = self.canvas.copy_from_bbox(self.fig.bbox)
+        self.draw_plot_lines()
+        
+    def draw_plot_lines(self):
+        # Loaded by build_chart before any plotting
+        from chart import envelope_outline
+        
+        # Raw samples or the rollup tier that fits the window in the axes' pixel width
+        x, values, _, extremes = self.current_history().window(self.chart_window, int(self.ax.bbox.width))
+        for column, (line, envelope) in enumerate(zip(self.plot_lines, self.plot_envelopes)):
+            line.set_data(x, values[:, column])
+            if extremes is None:
+                envelope.set_verts([])
+            else:
+                mins, maxs = extremes
+                envelope.set_verts([envelope_outline(x, mins[:, column], maxs[:, column])])
+        for envelope in self.plot_envelopes:
+            self.ax.draw_artist(envelope)
+        for line in self.plot_lines:
+            self.ax.draw_artist(line)
+        
+    def update_plot(self):
+        self.plot_pending = False
+        
+        # Skip redraws when nothing changed, the chart is not built yet or not visible (minimized)
+        if self.canvas is None:
+            return
+        if self.plotted_version == self.current_history().version:
+            return
+        if not self.canvas.get_tk_widget().winfo_viewable():
+            return
+        
+        # Stay within the frame-time budget; draw the latest data once it allows
+        now = time.perf_counter()
+        if now < self.next_frame_at:
+            self.plot_pending = True
+            self.after(max(1, int((self.next_frame_at - now) * 1000)), self.update_plot)
+            return
+        
+        self.plotted_version = self.current_history().version
+        if self.plot_background is None:
+            # No cached background yet, a full draw will fill it in
+            self.canvas.draw_idle()
+            return
+        
+        with self.profiler.stage("ui.plot_blit"):
+            self.canvas.restore_region(self.plot_background)
+            self.draw_plot_lines()
+            self.canvas.blit(self.fig.bbox)
+        
+        self.frame_time = time.perf_counter() - now
+        self.next_frame_at = now + self.frame_time / PLOT_CPU_BUDGET
+    
+    def toggle_stats(self):
+        if self.stats_switch.get():
+            self.stats_label.pack(fill="x", pady=(10, 0))
+            self.update_stats()
+        else:
+            self.stats_label.pack_forget()
+            self.after_cancel(self.stats_job)
+    
+    def update_stats(self):
+        # Stage p50/p99 plus this process's CPU since the last refresh and RSS
+        cpu_percent, _ = self.profiler.usage()
+        self.set_text(self.stats_label, self.profiler.report(cpu_percent))
+        self.stats_job = self.after(STATS_PANEL_MS, self.update_stats)
+    
+    def change_appearance_mode(self, new_appearance_mode):
+        ctk.set_appearance_mode(new_appearance_mode)
+        if self.fig is None:
+            return
+        # Update plot colors based on theme
+        if new_appearance_mode == "Dark" or (new_appearance_mode == "System" and ctk._get_appearance_mode() == "Dark"):
+            self.fig.patch.set_facecolor('#2b2b2b')
+            self.ax.set_facecolor('#2b2b2b')
+            self.ax.tick_params(colors='#cccccc')
+            self.ax.xaxis.label.set_color('#cccccc')
+            self.ax.yaxis.label.set_color('#cccccc')
+        else:
+            self.fig.patch.set_facecolor('#f0f0f0')
+            self.ax.set_facecolor('#f0f0f0')
+            self.ax.tick_params(colors='#333333')
+            self.ax.xaxis.label.set_color('#333333')
+            self.ax.yaxis.label.set_color('#333333')
+        self.canvas.draw_idle()
+        
+    def change_chart_window(self, choice):
+        self.chart_window = CHART_WINDOWS[choice]
+        if self.ax is None:
+            return
+        self.ax.set_xlim(-self.chart_window, 0)
+        # Axis limits are part of the cached background, so do a full redraw
+        self.plotted_version = -1
+        self.canvas.draw_idle()
+        
+    def change_refresh_rate(self, value):
+        self.refresh_rate = value
+        self.scheduler.set_interval(self.sample_task, value)
+        self.set_text(self.refresh_rate_label, f"{value:.1f} seconds")
+    
+    def notify_alert(self, alert):
+        # Called on the sampler thread; drain_mailbox builds the notification
+        self.alerts.put(alert)
+    
+    def show_alert(self, alert):
+        notification = ctk.CTkToplevel(self)
+        notification.geometry("360x110")
+        notification.title("Alert firing" if alert.state == "firing" else "Alert resolved")
+        
+        label = ctk.CTkLabel(notification, text=f"{alert.rule.text}\n{alert.state} (value {alert.value:.2f})")
+        label.pack(padx=20, pady=20)
+        
+        notification.after(10000, notification.destroy)
+    
+    def take_screenshot(self):
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        filename = f"sysmonitor_screenshot_{timestamp}.png"
+        self.attributes('-topmost', 1)  # Bring window to front
+        self.update()
+        self.attributes('-topmost', 0)
+        
+        # Wait a moment for window to be fully visible
+        time.sleep(0.5)
+        
+        try:
+            # Take screenshot using scrot on Linux
+            subprocess.run(['scrot', '-u', filename])
+            
+            # Show notification
+            notification = ctk.CTkToplevel(self)
+            notification.geometry("300x100")
+            notification.title("Screenshot Taken")
+            
+            label = ctk.CTkLabel(notification, text=f"Screenshot saved as:\n{filename}")
+            label.pack(padx=20, pady=20)
+            
+            # Auto-close notification after 3 seconds
+            notification.after(3000, notification.destroy)
+            
+        except Exception as e:
+            # Show error notification
+            notification = ctk.CTkToplevel(self)
+            notification.geometry("300x100")
+            notification.title("Error")
+            
+            label = ctk.CTkLabel(notification, text=f"Error taking screenshot:\n{str(e)}")
+            label.pack(padx=20, pady=20)
+            
+            notification.after(3000, notification.destroy)
+    
+    def open_process_window(self):
+        # Loaded on first use, startup does not need them
+        from netconns import ConnectionTracker
+        from process_groups import ProcessGroups
+        from process_table import COLUMNS, ProcessTable, group_items, process_items
+        
+        # Create new window for process list
+        process_window = ctk.CTkToplevel(self)
+        process_window.geometry("1080x600")
+        process_window.title("Process List")
+        
+        # Keep the registry sampling for as long as this window is open
+        registry = self.process_registry
+        registry.start()
+        
+        # Socket counts per process, refreshed on the registry thread while
+        # any process window is open
+        self.process_windows += 1
+        if registry.connections is None:
+            registry.connections = ConnectionTracker()
+        tracker = registry.connections
+        
+        # Tree/user/cgroup totals, updated by the registry as processes change
+        groups = ProcessGroups()
+        registry.add_listener(groups.update)
+        
+        def close_process_window():
+            registry.remove_listener(groups.update)
+            self.process_windows -= 1
+            if not self.process_windows:
+                registry.connections = None
+            registry.stop()
+            process_window.destroy()
+        
+        process_window.protocol("WM_DELETE_WINDOW", close_process_window)
+        
+        # Create header frame
+        header_frame = ctk.CTkFrame(process_window)
+        header_frame.pack(fill="x", padx=20, pady=(20, 0))
+        
+        # Create search box
+        search_var = ctk.StringVar()
+        search_entry = ctk.CTkEntry(header_frame, placeholder_text="Search processes...", width=200, textvariable=search_var)
+        search_entry.pack(side="left", padx=(0, 10))
+        
+        regex_var = ctk.BooleanVar(value=False)
+        regex_check = ctk.CTkCheckBox(header_frame, text="Regex", variable=regex_var, width=70)
+        regex_check.pack(side="left", padx=(0, 10))
+        
+        # Create sort options
+        sort_label = ctk.CTkLabel(header_frame, text="Sort by:")
+        sort_label.pack(side="left", padx=(10, 5))
+        
+        sort_var = ctk.StringVar(value="CPU")
+        sort_menu = ctk.CTkOptionMenu(header_frame, values=["CPU", "Memory", "Name", "Connections"], variable=sort_var)
+        sort_menu.pack(side="left", padx=5)
+        
+        group_label = ctk.CTkLabel(header_frame, text="Group by:")
+        group_label.pack(side="left", padx=(10, 5))
+        
+        group_var = ctk.StringVar(value="None")
+        group_menu = ctk.CTkOptionMenu(header_frame, values=["None", "Tree", "User", "Cgroup"], variable=group_var, width=100)
+        group_menu.pack(side="left", padx=5)
+        
+        # Keys of the open groups in the current grouping
+        expanded = set()
+        
+        # Create refresh button
+        refresh_button = ctk.CTkButton(header_frame, text="Refresh", width=100)
+        refresh_button.pack(side="right", padx=10)
+        
+        # Create process table
+        table_frame = ctk.CTkFrame(process_window)
+        table_frame.pack(fill="both", expand=True, padx=20, pady=20)
+        
+        # Create table headers
+        header_frame = ctk.CTkFrame(table_frame)
+        header_frame.pack(fill="x", pady=(0, 5))
+        
+        for title, width in COLUMNS:
+            ctk.CTkLabel(header_frame, text=title, width=width).pack(side="left", padx=5, pady=5)
+        ctk.CTkLabel(header_frame, text="Actions", width=100).pack(side="left", padx=5, pady=5)
+        
+        # Create virtualized table for the full process list
+        process_table = ProcessTable(table_frame, on_end=lambda pid: end_process(pid),
+                                     on_toggle=lambda group: toggle_group(group))
+        process_table.pack(fill="both", expand=True)
+        
+        # Function to populate process list
+        def populate_processes():
+            with self.profiler.stage("ui.populate_processes"):
+                fill_process_table()
+        
+        def fill_process_table():
+            # Get sort method
+            sort_method = sort_var.get()
+            
+            # Search the index over the registry's latest snapshot, no /proc scan here
+            processes = registry.index.search(search_var.get(), regex=regex_var.get())
+            if processes is None:
+                # Incomplete regex while typing: keep showing the previous results
+                return
+            
+            # Display processes; the table only builds widgets for visible rows
+            group_mode = group_var.get()
+            if group_mode != "None":
+                rows = groups.rows(group_mode, processes, sort_method, expanded)
+                process_table.set_items(group_items(rows, expanded, tracker.counts))
+            else:
+                process_table.set_items(process_items(processes, sort_method, tracker.counts))
+        
+        def toggle_group(group):
+            if group in expanded:
+                expanded.remove(group)
+            else:
+                expanded.add(group)
+            populate_processes()
+        
+        def change_grouping(*args):
+            expanded.clear()
+            populate_processes()
+        
+        # Redisplay whenever the background sampler publishes a new snapshot
+        shown_generation = [None]
+        
+        def watch_registry():
+            if not process_window.winfo_exists():
+                return
+            generation = (registry.generation, tracker.generation)
+            if shown_generation[0] != generation:
+                shown_generation[0] = generation
+                populate_processes()
+            process_window.after(250, watch_registry)
+        
+        # Function to end a process
+        def end_process(pid):
+            try:
+                process = psutil.Process(pid)
+                process.terminate()
+                # Refresh the list after a short delay
+                process_window.after(500, registry.request_refresh)
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                # Show error message
+                error_window = ctk.CTkToplevel(process_window)
+                error_window.geometry("300x100")
+                error_window.title("Error")
+                
+                label = ctk.CTkLabel(error_window, text="Cannot terminate process.\nAccess denied or process not found.")
+                label.pack(padx=20, pady=20)
+                
+                error_window.after(3000, error_window.destroy)
+        
+        # Initial population
+        watch_registry()
+        
+        # Bind refresh button
+        refresh_button.configure(command=registry.request_refresh)
+        
+        # Coalesce keystrokes so only the latest query runs
+        pending_search = [None]
+        
+        def schedule_search(*args):
+            if pending_search[0] is not None:
+                process_window.after_cancel(pending_search[0])
+            pending_search[0] = process_window.after(150, run_search)
+        
+        def run_search():
+            pending_search[0] = None
+            populate_processes()
+        
+        # Bind search and sort events
+        search_var.trace_add("write", schedule_search)
+        regex_var.trace_add("write", schedule_search)
+        sort_var.trace_add("write", lambda *args: populate_processes())
+        group_var.trace_add("write", change_grouping)
+    
+    def on_closing(self):
+        # Wakes the scheduler right away instead of waiting out a sleep
+        self.scheduler.stop()
+        # Wait for thread to finish (never started when replaying)
+        if self.update_thread.is_alive():
+            self.update_thread.join(timeout=1.0)
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.profile:
+            print(self.profiler.report(), file=sys.stderr)
+        self.destroy()
@@ -0,0 +1,159 @@
+import os
+import time
+from collections import namedtuple
+
+import psutil
+
+# Socket tables read on Linux; elsewhere psutil.net_connections() is used
+PROC_NET_TABLES = ("tcp", "tcp6", "udp", "udp6")
+# Kernel TCP states, from include/net/tcp_states.h
+TCP_ESTABLISHED = 0x01
+TCP_LISTEN = 0x0A
+
+# Per-process socket summary; queued is the bytes waiting in send and
+# receive queues, a sign of a slow peer or a process not reading
+ConnectionCounts = namedtuple("ConnectionCounts", ["total", "established", "listening", "queued"])
+
+
+def parse_socket_table(text, udp=False):
+    # (inode, state, queued bytes) per socket in one /proc/net/{tcp,udp}[6]
+    # table. Inode 0 (TIME_WAIT and similar) belongs to no process.
+    sockets = []
+    for line in text.splitlines()[1:]:
+        fields = line.split()
+        inode = int(fields[9])
+        if not inode:
+            continue
+        tx_queue, rx_queue = fields[4].split(":")
+        # UDP has no connection states; count bound sockets as listening
+        state = TCP_LISTEN if udp else int(fields[3], 16)
+        sockets.append((inode, state, int(tx_queue, 16) + int(rx_queue, 16)))
+    return sockets
+
+
+def read_proc_sockets(root="/proc/net"):
+    # Every socket in this network namespace, or None without /proc/net
+    sockets = []
+    for name in PROC_NET_TABLES:
+        try:
+            with open(os.path.join(root, name)) as f:
+                text = f.read()
+        except FileNotFoundError:
+            if name.endswith("6"):
+                # IPv6 disabled
+                continue
+            return None
+        sockets += parse_socket_table(text, udp=name.startswith("udp"))
+    return sockets
+
+
+def tally(entries):
+    # ConnectionCounts per pid from (pid, state, queued) entries
+    counts = {}
+    for pid, state, queued in entries:
+        entry = counts.get(pid)
+        if entry is None:
+            entry = counts[pid] = [0, 0, 0, 0]
+        entry[0] += 1
+        if state == TCP_ESTABLISHED:
+            entry[1] += 1
+        elif state == TCP_LISTEN:
+            entry[2] += 1
+        entry[3] += queued
+    return {pid: ConnectionCounts(*entry) for pid, entry in counts.items()}
+
+
+def socket_inodes(pid):
+    # Inodes of the sockets a process has open, from its fd symlinks
+    inodes = []
+    try:
+        with os.scandir(f"/proc/{pid}/fd") as entries:
+            for entry in entries:
+                try:
+                    target = os.readlink(entry.path)
+                except OSError:
+                    continue
+                if target.startswith("socket:["):
+                    inodes.append(int(target[8:-1]))
+    except OSError:
+        pass
+    return inodes
+
+
+class ConnectionTracker:
+    # Per-process socket counts, joined against the process registry.
+    # Walking every process's fds is the expensive part, so the tracker
+    # refreshes at most every `interval` seconds and keeps an inode -> pid
+    # map between refreshes: only sockets not seen before need a walk, and
+    # the walk stops as soon as they are all found. Sockets whose owner
+    # cannot be read (another user's process) are retried every
+    # `retry_interval` seconds rather than on every refresh.
+    def __init__(self, interval=5.0, retry_interval=30.0):
+        self.interval = interval
+        self.retry_interval = retry_interval
+        self.owners = {}
+        self.unowned = set()
+        self.next_refresh = 0.0
+        self.next_retry = 0.0
+        self.counts = {}
+        self.generation = 0
+
+    def due(self):
+        # Rate limit: true at most once per interval
+        now = time.monotonic()
+        if now < self.next_refresh:
+            return False
+        self.next_refresh = now + self.interval
+        return True
+
+    def refresh(self, processes):
+        # processes: the registry's pid -> ProcessInfo map
+        now = time.monotonic()
+        sockets = read_proc_sockets()
+        if sockets is None:
+            self.counts = self.counts_from_psutil(processes)
+            self.generation += 1
+            return
+
+        inodes = {inode for inode, _, _ in sockets}
+        # Closed sockets and exited processes drop out of the map
+        owners = {inode: pid for inode, pid in self.owners.items() if inode in inodes and pid in processes}
+        missing = inodes - owners.keys()
+        retry = now >= self.next_retry
+        if retry:
+            self.next_retry = now + self.retry_interval
+        else:
+            missing -= self.unowned
+        if missing:
+            self.resolve(missing, owners, processes)
+        # Whatever is still missing has no owner we can see
+        self.unowned = missing if retry else (self.unowned & inodes) | missing
+        self.owners = owners
+
+        self.counts = tally((owners[inode], state, queued)
+                            for inode, state, queued in sockets if inode in owners)
+        self.generation += 1
+
+    def resolve(self, missing, owners, processes):
+        # Walk fds until every missing inode has an owner, starting with
+        # processes that already own sockets since they tend to open more
+        known = set(owners.values())
+        order = sorted(processes, key=lambda pid: pid not in known)
+        for pid in order:
+            for inode in socket_inodes(pid):
+                if inode in missing:
+                    owners[inode] = pid
+                    missing.discard(inode)
+            if not missing:
+                break
+
+    def counts_from_psutil(self, processes):
+        # Non-Linux fallback: psutil resolves owners itself
+        try:
+            connections = psutil.net_connections(kind="inet")
+        except psutil.AccessDenied:
+            return {}
+        states = {psutil.CONN_ESTABLISHED: TCP_ESTABLISHED, psutil.CONN_LISTEN: TCP_LISTEN,
+                  psutil.CONN_NONE: TCP_LISTEN}
+        return tally((conn.pid, states.get(conn.status), 0)
+                     for conn in connections if conn.pid in processes)
@@ -0,0 +1,204 @@
+import threading
+
+# Aggregate columns kept per group, in vector order
+VALUE_FIELDS = ("cpu_percent", "memory_percent", "read_rate", "write_rate", "count")
+# Deepest ancestor chain followed; guards against ppid loops
+MAX_DEPTH = 64
+
+
+def values_of(info):
+    return [info.cpu_percent, info.memory_percent, info.read_rate, info.write_rate, 1]
+
+
+def add_values(target, values, sign=1):
+    for i, value in enumerate(values):
+        target[i] += sign * value
+
+
+class FlatGroups:
+    # Totals per key (user, cgroup), kept up to date from registry changes
+    def __init__(self, key):
+        self.key = key
+        self.totals = {}
+        self.members = {}
+
+    def add(self, info):
+        key = self.key(info)
+        add_values(self.totals.setdefault(key, [0.0] * len(VALUE_FIELDS)), values_of(info))
+        self.members.setdefault(key, set()).add(info.pid)
+
+    def remove(self, info):
+        key = self.key(info)
+        members = self.members[key]
+        members.discard(info.pid)
+        if members:
+            add_values(self.totals[key], values_of(info), -1)
+        else:
+            del self.members[key]
+            del self.totals[key]
+
+
+class ProcessTree:
+    # Parent/child links with subtree totals. Invariant: subtree[pid] is the
+    # process's own values plus the subtrees of its children, so a change
+    # costs one walk up the ancestor chain instead of a full rebuild.
+    def __init__(self):
+        self.own = {}
+        self.subtree = {}
+        self.parent = {}
+        self.children = {}
+
+    def ancestors(self, pid):
+        parent = self.parent.get(pid)
+        seen = {pid}
+        while parent in self.own and parent not in seen and len(seen) <= MAX_DEPTH:
+            yield parent
+            seen.add(parent)
+            parent = self.parent.get(parent)
+
+    def propagate(self, pid, values, sign=1):
+        for ancestor in self.ancestors(pid):
+            add_values(self.subtree[ancestor], values, sign)
+
+    def add(self, info):
+        pid = info.pid
+        self.own[pid] = values_of(info)
+        self.parent[pid] = info.ppid
+        self.children.setdefault(info.ppid, set()).add(pid)
+        # Children seen before their parent are adopted now
+        subtree = list(self.own[pid])
+        for child in self.children.get(pid, ()):
+            if child in self.subtree:
+                add_values(subtree, self.subtree[child])
+        self.subtree[pid] = subtree
+        self.propagate(pid, subtree)
+
+    def update(self, info):
+        pid = info.pid
+        values = values_of(info)
+        delta = [new - old for new, old in zip(values, self.own[pid])]
+        self.own[pid] = values
+        if self.parent[pid] != info.ppid:
+            # Reparented: move the whole subtree to the new ancestor chain
+            self.propagate(pid, self.subtree[pid], -1)
+            self.children.get(self.parent[pid], set()).discard(pid)
+            self.parent[pid] = info.ppid
+            self.children.setdefault(info.ppid, set()).add(pid)
+            add_values(self.subtree[pid], delta)
+            self.propagate(pid, self.subtree[pid])
+        else:
+            add_values(self.subtree[pid], delta)
+            self.propagate(pid, delta)
+
+    def remove(self, info):
+        pid = info.pid
+        self.propagate(pid, self.subtree[pid], -1)
+        self.children.get(self.parent.pop(pid), set()).discard(pid)
+        del self.own[pid]
+        del self.subtree[pid]
+        # Orphans wait for the registry to report their new parent; they are
+        # not handed to a later process that reuses this pid
+        for child in self.children.pop(pid, ()):
+            self.parent[child] = None
+            self.children.setdefault(None, set()).add(child)
+
+    def roots(self):
+        return [pid for pid in self.own if self.parent[pid] not in self.own]
+
+    def children_of(self, pid):
+        return [child for child in self.children.get(pid, ()) if child in self.own]
+
+
+class ProcessGroups:
+    # Tree, per-user and per-cgroup aggregates over the registry's processes,
+    # maintained incrementally: register update() as a registry listener
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.processes = {}
+        self.tree = ProcessTree()
+        self.users = FlatGroups(lambda info: info.username or "?")
+        self.cgroups = FlatGroups(lambda info: info.cgroup or "/")
+        self.generation = 0
+
+    def update(self, updated, removed):
+        with self.lock:
+            for info in removed:
+                self.processes.pop(info.pid, None)
+                self.tree.remove(info)
+                self.users.remove(info)
+                self.cgroups.remove(info)
+            for old, info in updated:
+                self.processes[info.pid] = info
+                if old is None:
+                    self.tree.add(info)
+                else:
+                    self.tree.update(info)
+                    self.users.remove(old)
+                    self.cgroups.remove(old)
+                self.users.add(info)
+                self.cgroups.add(info)
+            if updated or removed:
+                self.generation += 1
+
+    def rows(self, mode, matches, sort, expanded):
+        # Flattened view for the process table: (key, depth, name, values, info,
+        # expandable) per visible row, info being None for user/cgroup rows. `matches` are the processes the search
+        # kept and `expanded` holds the keys of the open groups.
+        with self.lock:
+            if mode == "Tree":
+                return self.tree_rows(matches, sort, expanded)
+            groups = self.users if mode == "User" else self.cgroups
+            return self.flat_rows(groups, matches, sort, expanded)
+
+    def tree_rows(self, matches, sort, expanded):
+        tree = self.tree
+        # Keep the ancestors of every match so each match stays reachable
+        visible = set()
+        for info in matches:
+            if info.pid in tree.own and info.pid not in visible:
+                visible.add(info.pid)
+                visible.update(tree.ancestors(info.pid))
+
+        def ordered(pids):
+            return order([(self.processes[pid].name, tree.subtree[pid], pid) for pid in pids if pid in visible], sort)
+
+        rows = []
+        # Depth-first; children are pushed in reverse so they pop in sort order
+        stack = [(pid, 0) for pid in reversed(ordered(tree.roots()))]
+        while stack:
+            pid, depth = stack.pop()
+            children = ordered(tree.children_of(pid))
+            key = ("pid", pid)
+            is_open = key in expanded
+            # A closed node stands for its whole subtree
+            values = tree.own[pid] if is_open or not children else tree.subtree[pid]
+            info = self.processes[pid]
+            rows.append((key, depth, info.name, values, info, bool(children)))
+            if is_open:
+                stack.extend((child, depth + 1) for child in reversed(children))
+        return rows
+
+    def flat_rows(self, groups, matches, sort, expanded):
+        members = {}
+        for info in matches:
+            if info.pid in self.processes:
+                members.setdefault(groups.key(info), []).append(info)
+
+        rows = []
+        for key in order([(key, groups.totals[key], key) for key in members], sort):
+            rows.append((key, 0, f"{key} ({len(members[key])} procs)", groups.totals[key], None, True))
+            if key in expanded:
+                for info in order([(info.name, values_of(info), info) for info in members[key]], sort):
+                    rows.append((("pid", info.pid), 1, info.name, values_of(info), info, False))
+        return rows
+
+
+def order(entries, sort):
+    # entries: (name, values, item); returns the items in display order.
+    # Groups carry no connection totals, so "Connections" sorts by CPU here.
+    if sort == "Name":
+        entries.sort(key=lambda entry: entry[0].lower())
+    else:
+        column = 1 if sort == "Memory" else 0
+        entries.sort(key=lambda entry: entry[1][column], reverse=True)
+    return [entry[2] for entry in entries]
@@ -0,0 +1,193 @@
+import math
+
+import customtkinter as ctk
+
+from sampler import format_rate
+
+# Column titles and widths, shared with the header row
+COLUMNS = (("PID", 80), ("Name", 260), ("CPU %", 80), ("Memory %", 80), ("I/O", 100), ("Conns", 70),
+           ("Status", 100))
+ROW_HEIGHT = 42
+
+
+def format_io(rate):
+    return format_rate(rate / 1024) if rate else "-"
+
+
+def format_connections(counts):
+    # Open sockets, with how many are listening
+    if counts is None:
+        return ""
+    if counts.listening:
+        return f"{counts.total} ({counts.listening} L)"
+    return str(counts.total)
+
+
+def process_items(processes, sort_method, connections=None):
+    # Table items for a flat list of ProcessInfo, sorted by "CPU", "Memory",
+    # "Name" or "Connections"; connections maps pid -> ConnectionCounts
+    connections = connections or {}
+    if sort_method == "CPU":
+        processes = sorted(processes, key=lambda x: x.cpu_percent, reverse=True)
+    elif sort_method == "Memory":
+        processes = sorted(processes, key=lambda x: x.memory_percent, reverse=True)
+    elif sort_method == "Name":
+        processes = sorted(processes, key=lambda x: x.name.lower())
+    elif sort_method == "Connections":
+        processes = sorted(processes, key=lambda x: connections[x.pid].total if x.pid in connections else 0,
+                           reverse=True)
+    return [
+        (proc.pid, (
+            str(proc.pid),
+            proc.name,
+            f"{proc.cpu_percent:.1f}%",
+            f"{proc.memory_percent:.1f}%",
+            format_io(proc.read_rate + proc.write_rate),
+            format_connections(connections.get(proc.pid)),
+            proc.status,
+        ))
+        for proc in processes
+    ]
+
+
+def group_items(rows, expanded, connections=None):
+    # Table items for ProcessGroups.rows(); group rows toggle on their key
+    connections = connections or {}
+    return [
+        (info.pid if info else None, (
+            str(info.pid) if info else "",
+            "    " * depth + (("▾ " if key in expanded else "▸ ") if expandable else "") + name,
+            f"{values[0]:.1f}%",
+            f"{values[1]:.1f}%",
+            format_io(values[2] + values[3]),
+            format_connections(connections.get(info.pid)) if info else "",
+            info.status if info else "",
+        ), key if expandable else None)
+        for key, depth, name, values, info, expandable in rows
+    ]
+
+
+class ProcessRow:
+    # One reusable row of widgets; rows are recycled while scrolling
+    def __init__(self, master, on_end, on_toggle):
+        self.pid = None
+        self.group = None
+        self.frame = ctk.CTkFrame(master)
+        self.labels = []
+        for title, width in COLUMNS:
+            label = ctk.CTkLabel(self.frame, text="", width=width, anchor="w" if title == "Name" else "center")
+            label.pack(side="left", padx=5, pady=5)
+            self.labels.append(label)
+        self.texts = [None] * len(COLUMNS)
+
+        # Clicking the name of a group row opens or closes it
+        self.labels[1].bind("<Button-1>", lambda event: self.group is not None and on_toggle(self.group))
+
+        # Create end process button
+        self.end_button = ctk.CTkButton(self.frame, text="End", width=80,
+                                        command=lambda: on_end(self.pid))
+        self.end_button.pack(side="left", padx=10)
+        self.end_enabled = True
+        self.visible = False
+
+    def show(self, index, pid, texts, group=None):
+        # Group rows have no pid of their own when they stand for a user or cgroup
+        if (pid is not None) != self.end_enabled:
+            self.end_enabled = pid is not None
+            self.end_button.configure(state="normal" if self.end_enabled else "disabled")
+        self.pid = pid
+        self.group = group
+        # Only reconfigure the cells whose text actually changed
+        for i, text in enumerate(texts):
+            if self.texts[i] != text:
+                self.labels[i].configure(text=text)
+                self.texts[i] = text
+        if not self.visible:
+            self.frame.place(x=0, y=index * ROW_HEIGHT, relwidth=1, height=ROW_HEIGHT - 4)
+            self.visible = True
+
+    def hide(self):
+        if self.visible:
+            self.frame.place_forget()
+            self.visible = False
+
+
+class ProcessTable(ctk.CTkFrame):
+    # Virtualized table: only the rows that fit on screen exist as widgets,
+    # and they are refilled from `items` as the view scrolls
+    def __init__(self, master, on_end, on_toggle=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_end = on_end
+        self.on_toggle = on_toggle
+        self.items = []
+        self.offset = 0
+        self.rows = []
+
+        self.scrollbar = ctk.CTkScrollbar(self, command=self.yview)
+        self.scrollbar.pack(side="right", fill="y")
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.pack(side="left", fill="both", expand=True)
+
+        self.body.bind("<Configure>", self.on_resize)
+        toplevel = self.winfo_toplevel()
+        toplevel.bind("<MouseWheel>", self.on_mousewheel, add="+")
+        toplevel.bind("<Button-4>", lambda event: self.scroll(-3), add="+")
+        toplevel.bind("<Button-5>", lambda event: self.scroll(3), add="+")
+
+    @property
+    def visible_rows(self):
+        return len(self.rows)
+
+    def set_items(self, items):
+        # items: sorted list of (pid, texts) or (pid, texts, group) covering
+        # the whole process list; group is the key passed to on_toggle
+        self.items = items
+        self.offset = self.clamp(self.offset)
+        self.render()
+
+    def clamp(self, offset):
+        return max(0, min(offset, len(self.items) - self.visible_rows))
+
+    def render(self):
+        for i, row in enumerate(self.rows):
+            index = self.offset + i
+            if index < len(self.items):
+                row.show(i, *self.items[index])
+            else:
+                row.hide()
+
+        # Update scrollbar thumb
+        if self.items:
+            first = self.offset / len(self.items)
+            last = min(1.0, (self.offset + self.visible_rows) / len(self.items))
+        else:
+            first, last = 0.0, 1.0
+        self.scrollbar.set(first, last)
+
+    def on_resize(self, event):
+        # Keep just enough row widgets to fill the visible area
+        needed = max(1, math.ceil(event.height / ROW_HEIGHT))
+        while len(self.rows) < needed:
+            self.rows.append(ProcessRow(self.body, self.on_end, self.on_toggle))
+        while len(self.rows) > needed:
+            self.rows.pop().frame.destroy()
+        self.offset = self.clamp(self.offset)
+        self.render()
+
+    def scroll(self, delta):
+        offset = self.clamp(self.offset + delta)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_mousewheel(self, event):
+        self.scroll(-int(event.delta / 120) * 3 if abs(event.delta) >= 120 else -event.delta)
+
+    def yview(self, *args):
+        # Scrollbar protocol: ("moveto", fraction) or ("scroll", n, "units"/"pages")
+        if args[0] == "moveto":
+            self.offset = self.clamp(int(float(args[1]) * len(self.items)))
+            self.render()
+        elif args[0] == "scroll":
+            step = self.visible_rows if args[2] == "pages" else 1
+            self.scroll(int(args[1]) * step)
@@ -0,0 +1,274 @@
+import bisect
+import re
+import threading
+import time
+from collections import namedtuple
+
+import psutil
+
+from profiling import NULL_PROFILER
+
+# Seconds until the follow-up refresh after a pass that met mostly new
+# processes: their first cpu_percent() reads are 0.0 until measured again
+PRIME_INTERVAL = 0.5
+
+ProcessInfo = namedtuple("ProcessInfo", [
+    "pid", "create_time", "name", "cpu_percent", "memory_percent", "status",
+    "username", "cmdline",
+    "ppid", "rss", "read_rate", "write_rate", "cgroup",
+])
+
+def read_cgroup(pid):
+    # cgroup v2 path ("0::/system.slice/nginx.service"), or the systemd
+    # hierarchy on cgroup v1 hosts; empty where /proc/<pid>/cgroup is missing
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ""
+    paths = {}
+    for line in lines:
+        _, controllers, path = line.split(":", 2)
+        paths[controllers] = path
+    return paths.get("", paths.get("name=systemd", next(iter(paths.values()), "")))
+
+
+def read_static(proc):
+    # Facts that do not change over a process's life, read once per process
+    try:
+        username = proc.username()
+    except (psutil.AccessDenied, KeyError):
+        username = ""
+    try:
+        cmdline = " ".join(proc.cmdline())
+    except psutil.AccessDenied:
+        cmdline = ""
+    return username, cmdline, read_cgroup(proc.pid)
+
+
+class ProcessIndex:
+    # Search index over one registry snapshot. Each process gets one
+    # lowercase line "pid name user cmdline"; the lines are joined into a
+    # single string so substring queries are a few str.find() calls.
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+        self.lines = [
+            f"{proc.pid} {proc.name} {proc.username} {proc.cmdline}".lower()
+            for proc in snapshot
+        ]
+        self.text = "\n".join(self.lines)
+        self.starts = []
+        offset = 0
+        for line in self.lines:
+            self.starts.append(offset)
+            offset += len(line) + 1
+        self.last_query = None
+        self.last_matches = None
+
+    def find(self, query):
+        # Indices of lines containing query, in snapshot order
+        matches = []
+        pos = self.text.find(query)
+        while pos != -1:
+            index = bisect.bisect_right(self.starts, pos) - 1
+            matches.append(index)
+            # Continue from the next line, one hit per process is enough
+            if index + 1 >= len(self.starts):
+                break
+            pos = self.text.find(query, self.starts[index + 1])
+        return matches
+
+    def search(self, query, regex=False):
+        # Returns matching ProcessInfo entries, or None for an invalid regex
+        if not query:
+            return self.snapshot
+        if regex:
+            try:
+                pattern = re.compile(query, re.IGNORECASE)
+            except re.error:
+                return None
+            return [proc for proc, line in zip(self.snapshot, self.lines) if pattern.search(line)]
+
+        query = query.lower()
+        if self.last_query is not None and self.last_query in query:
+            # Refining the previous query (e.g. typing on): only recheck its hits
+            matches = [i for i in self.last_matches if query in self.lines[i]]
+        elif len(query) < 3:
+            # Very short queries hit most lines, a plain scan beats hopping with find()
+            matches = [i for i, line in enumerate(self.lines) if query in line]
+        else:
+            matches = self.find(query)
+        self.last_query, self.last_matches = query, matches
+        return [self.snapshot[i] for i in matches]
+
+
+class ProcessRegistry:
+    # Long-lived psutil.Process objects identified by (pid, create_time), sampled
+    # on a background thread. Readers use `snapshot`, which is replaced as a
+    # whole after each refresh, so they never touch /proc themselves.
+    def __init__(self, interval=2.0, profiler=NULL_PROFILER):
+        self.interval = interval
+        self.profiler = profiler
+        self.processes = {}
+        self.snapshot = []
+        self.index = ProcessIndex([])
+        self.static = {}
+        self.io = {}
+        self.by_pid = {}
+        self.listeners = []
+        # Optional netconns.ConnectionTracker, refreshed on this thread at its own rate
+        self.connections = None
+        # Processes first seen by the latest refresh
+        self.primed = 0
+        self.generation = 0
+        self.users = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = None
+        self.stop_event = None
+
+    def refresh(self):
+        snapshot = []
+        processes = {}
+        static = {}
+        io = {}
+        primed = 0
+        now = time.monotonic()
+        total_memory = psutil.virtual_memory().total
+        for pid in psutil.pids():
+            try:
+                proc = self.processes.get(pid)
+                # A reused PID has a different create time; start over with a fresh object
+                if proc is None or not proc.is_running():
+                    proc = psutil.Process(pid)
+                    # The first cpu_percent() call only primes the counters
+                    proc.cpu_percent(None)
+                    primed += 1
+                    self.static[pid] = read_static(proc)
+                username, cmdline, cgroup = self.static[pid]
+                # Batch every /proc read for this process into one pass
+                with proc.oneshot():
+                    rss = proc.memory_info().rss
+                    read_rate, write_rate = self.io_rates(proc, now, io)
+                    info = ProcessInfo(
+                        pid,
+                        proc.create_time(),
+                        proc.name(),
+                        proc.cpu_percent(None),
+                        rss * 100 / total_memory,
+                        proc.status(),
+                        username,
+                        cmdline,
+                        proc.ppid(),
+                        rss,
+                        read_rate,
+                        write_rate,
+                        cgroup,
+                    )
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            except psutil.AccessDenied:
+                # Keep the process listed with whatever we are allowed to see
+                if proc is None:
+                    continue
+                info = ProcessInfo(pid, 0.0, "", 0.0, 0.0, "", "", "", 0, 0, 0.0, 0.0, "")
+            processes[pid] = proc
+            static[pid] = self.static.get(pid, ("", "", ""))
+            snapshot.append(info)
+
+        self.primed = primed
+
+        # Build the search index here so the UI thread only queries it
+        index = ProcessIndex(snapshot)
+
+        # Work out what changed since the last refresh, for incremental listeners
+        by_pid = {info.pid: info for info in snapshot}
+        updated = []
+        for info in snapshot:
+            old = self.by_pid.get(info.pid)
+            if old is None or old.create_time != info.create_time:
+                updated.append((None, info))
+            elif old != info:
+                updated.append((old, info))
+        removed = [old for pid, old in self.by_pid.items()
+                   if pid not in by_pid or by_pid[pid].create_time != old.create_time]
+
+        # Dead PIDs are evicted simply by not being carried over
+        with self.lock:
+            self.processes = processes
+            self.static = static
+            self.io = io
+            self.by_pid = by_pid
+            self.snapshot = snapshot
+            self.index = index
+            self.generation += 1
+            # Under the lock, so add_listener's seed and these changes never overlap
+            for listener in self.listeners:
+                listener(updated, removed)
+        return snapshot
+
+    def io_rates(self, proc, now, io):
+        # Bytes per second read and written since the previous refresh
+        try:
+            counters = proc.io_counters()
+        except (psutil.AccessDenied, AttributeError):
+            return 0.0, 0.0
+        io[proc.pid] = (now, counters.read_bytes, counters.write_bytes)
+        previous = self.io.get(proc.pid)
+        if previous is None or now <= previous[0]:
+            return 0.0, 0.0
+        elapsed = now - previous[0]
+        return (max(0, counters.read_bytes - previous[1]) / elapsed,
+                max(0, counters.write_bytes - previous[2]) / elapsed)
+
+    def request_refresh(self):
+        self.wake.set()
+
+    def run(self, stop_event):
+        while not stop_event.is_set():
+            with self.profiler.stage("processes.refresh"):
+                self.refresh()
+            connections = self.connections
+            if connections is not None and connections.due():
+                with self.profiler.stage("processes.connections"):
+                    connections.refresh(self.by_pid)
+            # The first pass, or a burst of new processes, left most CPU
+            # figures at 0.0; measure them again soon rather than show
+            # zeros for a whole interval
+            if self.primed * 2 > len(self.snapshot):
+                self.wake.wait(min(PRIME_INTERVAL, self.interval))
+            else:
+                self.wake.wait(self.interval)
+            self.wake.clear()
+
+    def add_listener(self, listener):
+        # listener(updated, removed) runs in the registry thread after every
+        # refresh; `updated` holds (old or None, new) ProcessInfo pairs. It is
+        # first called with the current snapshot, all of it as new.
+        with self.lock:
+            self.listeners.append(listener)
+            listener([(None, info) for info in self.snapshot], [])
+
+    def remove_listener(self, listener):
+        with self.lock:
+            self.listeners.remove(listener)
+
+    def start(self):
+        # Reference counted so several views can share one sampler thread
+        with self.lock:
+            self.users += 1
+            if self.thread is not None:
+                return
+            self.stop_event = threading.Event()
+            self.thread = threading.Thread(target=self.run, args=(self.stop_event,), daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        with self.lock:
+            self.users = max(0, self.users - 1)
+            if self.users or self.thread is None:
+                return
+            self.stop_event.set()
+            thread, self.thread = self.thread, None
+        self.wake.set()
+        thread.join(timeout=1.0)
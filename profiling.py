@@ -0,0 +1,129 @@
+import math
+import os
+import time
+
+import psutil
+
+# Log-scale buckets: 4 per power of two of nanoseconds, so a percentile is
+# exact to within ~19% and recording is one log2 and one list increment
+BUCKETS_PER_OCTAVE = 4
+BUCKET_COUNT = 40 * BUCKETS_PER_OCTAVE  # up to 2**40 ns, about 18 minutes
+
+
+class Histogram:
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = [0] * BUCKET_COUNT
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        bucket = int(math.log2(ns) * BUCKETS_PER_OCTAVE) if ns > 1 else 0
+        self.counts[min(bucket, BUCKET_COUNT - 1)] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max:
+            self.max = ns
+
+    def percentile(self, fraction):
+        # Upper edge of the bucket holding the requested rank, in seconds
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(2 ** ((bucket + 1) / BUCKETS_PER_OCTAVE), self.max) / 1e9
+        return self.max / 1e9
+
+
+class Stage:
+    # Context manager timing one stage into its histogram. A stage is
+    # timed from one thread at a time (each belongs to one loop).
+    __slots__ = ("histogram", "start")
+
+    def __init__(self):
+        self.histogram = Histogram()
+        self.start = 0
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.add(time.perf_counter_ns() - self.start)
+
+
+class NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_STAGE = NullStage()
+
+
+class Profiler:
+    # Per-stage timing histograms plus the monitor's own CPU and memory use
+    enabled = True
+
+    def __init__(self):
+        self.stages = {}
+        self.started = time.monotonic()
+        self.process = psutil.Process(os.getpid())
+        self.process.cpu_percent(None)
+
+    def stage(self, name):
+        stage = self.stages.get(name)
+        if stage is None:
+            stage = self.stages[name] = Stage()
+        return stage
+
+    def record(self, name, seconds):
+        # For spans that do not fit a with block, such as time to first frame
+        self.stage(name).histogram.add(int(seconds * 1e9))
+
+    def usage(self):
+        # CPU percent since the previous call and resident memory in MB
+        with self.process.oneshot():
+            return self.process.cpu_percent(None), self.process.memory_info().rss / 1024**2
+
+    def average_cpu(self):
+        times = self.process.cpu_times()
+        elapsed = time.monotonic() - self.started
+        return (times.user + times.system) / elapsed * 100 if elapsed > 0 else 0.0
+
+    def report(self, cpu_percent=None):
+        if cpu_percent is None:
+            cpu_percent = self.average_cpu()
+        rss_mb = self.process.memory_info().rss / 1024**2
+        lines = [f"gearsmap: CPU {cpu_percent:.1f}%  RSS {rss_mb:.1f} MB",
+                 f"{'stage':<32}{'count':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}"]
+        for name in sorted(self.stages):
+            histogram = self.stages[name].histogram
+            lines.append(f"{name:<32}{histogram.count:>8}"
+                         f"{histogram.percentile(0.5) * 1000:>10.3f}"
+                         f"{histogram.percentile(0.99) * 1000:>10.3f}"
+                         f"{histogram.max / 1e6:>10.3f}")
+        return "\n".join(lines)
+
+
+class NullProfiler:
+    # Stand-in when profiling is off: stages cost one attribute lookup
+    enabled = False
+
+    def stage(self, name):
+        return NULL_STAGE
+
+    def record(self, name, seconds):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
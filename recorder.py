@@ -0,0 +1,167 @@
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from sampler import Sample
+
+# Segment layout: a fixed HEADER_SIZE-byte header (magic, then a JSON
+# description of the columns, NUL padded) followed by fixed-width
+# little-endian records: int64 timestamp in ns, then one float32 per
+# metric. Whole records are only ever appended, so a segment can be
+# memory-mapped as a NumPy structured array while it is still growing.
+MAGIC = b"GMREC\x00\x01\x00"
+HEADER_SIZE = 512
+FIELDS = Sample._fields[1:]
+RECORD = struct.Struct("<q" + "f" * len(FIELDS))
+SEGMENT_SUFFIX = ".gmrec"
+DTYPE = np.dtype([("timestamp", "<i8")] + [(name, "<f4") for name in FIELDS])
+
+
+def segment_name(start_ns):
+    return f"gearsmap-{start_ns:020d}{SEGMENT_SUFFIX}"
+
+
+def segment_start(path):
+    return int(os.path.basename(path)[len("gearsmap-"):-len(SEGMENT_SUFFIX)])
+
+
+def build_header():
+    description = json.dumps({
+        "version": 1,
+        "timestamp": "int64 ns since epoch",
+        "fields": list(FIELDS),
+        "record_size": RECORD.size,
+    }).encode()
+    header = MAGIC + description
+    if len(header) > HEADER_SIZE:
+        raise ValueError("too many fields for the segment header")
+    return header.ljust(HEADER_SIZE, b"\x00")
+
+
+def read_header(path):
+    with open(path, "rb") as f:
+        header = f.read(HEADER_SIZE)
+    if len(header) < HEADER_SIZE or not header.startswith(MAGIC):
+        raise ValueError(f"{path} is not a GearsMap recording")
+    return json.loads(header[len(MAGIC):].rstrip(b"\x00"))
+
+
+class Recorder:
+    # Append-only writer. Records are buffered and written in batches of
+    # flush_records (or at least every flush_interval seconds), fsync runs
+    # at most every fsync_interval seconds, and a new segment file is
+    # started every segment_seconds.
+    def __init__(self, directory, segment_seconds=3600, flush_records=64,
+                 flush_interval=1.0, fsync_interval=30.0):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        os.makedirs(directory, exist_ok=True)
+
+        self.fd = None
+        self.segment_start = None
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.last_flush = time.monotonic()
+        self.last_fsync = self.last_flush
+
+    def append(self, sample):
+        timestamp_ns = int(sample.timestamp * 1e9)
+        if self.fd is None or timestamp_ns - self.segment_start >= self.segment_seconds * 1e9:
+            self.rollover(timestamp_ns)
+
+        self.buffer += RECORD.pack(timestamp_ns, *sample[1:])
+        self.buffered += 1
+
+        now = time.monotonic()
+        if self.buffered >= self.flush_records or now - self.last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if now is None:
+            now = time.monotonic()
+        if self.buffer:
+            os.write(self.fd, self.buffer)
+            self.buffer.clear()
+            self.buffered = 0
+        self.last_flush = now
+        if now - self.last_fsync >= self.fsync_interval:
+            os.fsync(self.fd)
+            self.last_fsync = now
+
+    def rollover(self, timestamp_ns):
+        self.close()
+        path = os.path.join(self.directory, segment_name(timestamp_ns))
+        self.fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        if os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, build_header())
+        self.segment_start = timestamp_ns
+
+    def close(self):
+        if self.fd is None:
+            return
+        self.flush()
+        os.fsync(self.fd)
+        os.close(self.fd)
+        self.fd = None
+
+
+class RecordingReader:
+    # Loads any time range of a recording directory as memory-mapped,
+    # read-only NumPy structured arrays
+    def __init__(self, directory):
+        self.directory = directory
+
+    def segment_paths(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith(SEGMENT_SUFFIX))
+        return [os.path.join(self.directory, name) for name in names]
+
+    def open_segment(self, path):
+        info = read_header(path)
+        if info["fields"] != list(FIELDS) or info["record_size"] != DTYPE.itemsize:
+            raise ValueError(f"{path} was written with an incompatible layout")
+        # Ignore a trailing partial record left by a crash mid-write
+        count = (os.path.getsize(path) - HEADER_SIZE) // DTYPE.itemsize
+        if count <= 0:
+            return np.empty(0, dtype=DTYPE)
+        return np.memmap(path, dtype=DTYPE, mode="r", offset=HEADER_SIZE, shape=(count,))
+
+    def segments(self, start=None, end=None):
+        # Yield zero-copy views covering [start, end) (epoch seconds, None = open)
+        start_ns = None if start is None else int(start * 1e9)
+        end_ns = None if end is None else int(end * 1e9)
+        paths = self.segment_paths()
+        for i, path in enumerate(paths):
+            if end_ns is not None and segment_start(path) >= end_ns:
+                break
+            # Segments are contiguous in time, so the next one bounds this one
+            if start_ns is not None and i + 1 < len(paths) and segment_start(paths[i + 1]) <= start_ns:
+                continue
+            records = self.open_segment(path)
+            timestamps = records["timestamp"]
+            lo = 0 if start_ns is None else np.searchsorted(timestamps, start_ns, side="left")
+            hi = len(records) if end_ns is None else np.searchsorted(timestamps, end_ns, side="left")
+            if hi > lo:
+                yield records[lo:hi]
+
+    def time_range(self):
+        # (first, last) sample time in epoch seconds, or None when empty
+        views = [self.open_segment(path) for path in self.segment_paths()]
+        views = [view for view in views if len(view)]
+        if not views:
+            return None
+        return views[0]["timestamp"][0] / 1e9, views[-1]["timestamp"][-1] / 1e9
+
+    def load(self, start=None, end=None):
+        # Single array for the range; zero-copy when it falls in one segment
+        parts = list(self.segments(start, end))
+        if not parts:
+            return np.empty(0, dtype=DTYPE)
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts)
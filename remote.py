@@ -0,0 +1,306 @@
+import asyncio
+import math
+import os
+import platform
+import struct
+import sys
+import threading
+import time
+
+from sampler import SLOW_INTERVAL, Sample, Sampler
+from scheduler import Mailbox, Scheduler
+
+# Wire protocol. After connecting, the agent sends HELLO: MAGIC, a
+# version byte and its hostname (length-prefixed UTF-8). Every sample
+# then follows as one frame: a varint payload length and the payload,
+# which holds one zigzag varint per Sample field. Fields are quantized
+# to integers (see SCALES) and sent as the difference to the previous
+# frame on the same connection, so a steady host costs a few bytes per
+# sample.
+MAGIC = b"GMAG"
+VERSION = 1
+SCALES = (
+    1000,   # timestamp, ms
+    100,    # cpu_percent
+    1,      # cpu_freq_mhz
+    100,    # ram_percent
+    1024,   # ram_used_gb, MB
+    1024,   # ram_total_gb, MB
+    10,     # recv_kb_s
+    10,     # sent_kb_s
+    10,     # total_kb_s
+    100,    # net_percent
+    1,      # uptime_seconds
+)
+# Largest unsent backlog per client before a slow reader is dropped
+MAX_BACKLOG = 64 * 1024
+# Largest frame payload accepted; a real one is at most 10 bytes per field
+MAX_FRAME = 256
+
+
+def encode_varint(value, out):
+    while value >= 0x80:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def decode_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -(value >> 1) - 1
+
+
+def parse_endpoint(endpoint):
+    # "host:port" for TCP, "unix:/path" for a Unix socket
+    if endpoint.startswith("unix:"):
+        return None, endpoint[len("unix:"):]
+    host, _, port = endpoint.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+class FrameEncoder:
+    def __init__(self):
+        self.previous = [0] * len(SCALES)
+
+    def encode(self, sample):
+        values = [0 if math.isnan(value) else round(value * scale) for value, scale in zip(sample, SCALES)]
+        payload = bytearray()
+        for value, previous in zip(values, self.previous):
+            encode_varint(zigzag(value - previous), payload)
+        self.previous = values
+
+        frame = bytearray()
+        encode_varint(len(payload), frame)
+        return bytes(frame + payload)
+
+
+class FrameDecoder:
+    def __init__(self):
+        self.previous = [0] * len(SCALES)
+
+    def decode(self, payload):
+        # Raises ValueError for a truncated or malformed payload
+        values = []
+        pos = 0
+        try:
+            for previous in self.previous:
+                delta, pos = decode_varint(payload, pos)
+                values.append(previous + unzigzag(delta))
+        except IndexError:
+            raise ValueError("truncated frame") from None
+        if pos != len(payload):
+            raise ValueError("trailing bytes in frame")
+        self.previous = values
+        sample = Sample(*(value / scale for value, scale in zip(values, SCALES)))
+        # NaN travels as 0; no real CPU runs at 0 MHz
+        if not sample.cpu_freq_mhz:
+            sample = sample._replace(cpu_freq_mhz=math.nan)
+        return sample
+
+
+def build_hello(hostname):
+    name = hostname.encode()[:255]
+    return MAGIC + struct.pack("BB", VERSION, len(name)) + name
+
+
+async def read_hello(reader):
+    header = await reader.readexactly(len(MAGIC) + 2)
+    if header[:len(MAGIC)] != MAGIC or header[len(MAGIC)] != VERSION:
+        raise ConnectionError("not a GearsMap agent")
+    return (await reader.readexactly(header[-1])).decode(errors="replace")
+
+
+async def read_frame(reader):
+    length = shift = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7f) << shift
+        if length > MAX_FRAME:
+            raise ValueError(f"frame of {length} bytes exceeds {MAX_FRAME}")
+        if byte < 0x80:
+            break
+        shift += 7
+    return await reader.readexactly(length)
+
+
+class Agent:
+    # Streams every sample to all connected dashboards. publish() must be
+    # called on the agent's event loop.
+    def __init__(self, hostname=None):
+        self.hello = build_hello(hostname or platform.node())
+        self.clients = {}
+
+    async def handle(self, reader, writer):
+        writer.write(self.hello)
+        # Each connection has its own delta state
+        self.clients[writer] = FrameEncoder()
+        try:
+            # Dashboards never send anything; wait for them to hang up
+            await reader.read()
+        finally:
+            self.clients.pop(writer, None)
+            writer.close()
+
+    def publish(self, sample):
+        for writer, encoder in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > MAX_BACKLOG:
+                self.clients.pop(writer)
+                writer.close()
+                continue
+            writer.write(encoder.encode(sample))
+
+    async def serve(self, endpoint):
+        host, port = parse_endpoint(endpoint)
+        if host is None:
+            return await asyncio.start_unix_server(self.handle, path=port)
+        return await asyncio.start_server(self.handle, host, port)
+
+
+def run_agent(endpoint, refresh_rate=1.0):
+    # Headless agent: the usual scheduler samples on its own thread and
+    # hands each sample to the event loop that serves the sockets
+    loop = asyncio.new_event_loop()
+    agent = Agent()
+    server = loop.run_until_complete(agent.serve(endpoint))
+
+    sampler = Sampler()
+    scheduler = Scheduler()
+    scheduler.add("sample", refresh_rate, lambda: loop.call_soon_threadsafe(agent.publish, sampler.sample()))
+    scheduler.add("slow", SLOW_INTERVAL, sampler.refresh_slow)
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+
+    print(f"gearsmap agent listening on {endpoint}", flush=True)
+    try:
+        loop.run_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        scheduler.stop()
+        server.close()
+        loop.close()
+        host, path = parse_endpoint(endpoint)
+        if host is None and os.path.exists(path):
+            os.unlink(path)
+
+
+class RemoteHost:
+    def __init__(self, endpoint, history_points):
+        # numpy-backed; imported here so agents do not need numpy
+        from history import MetricHistory
+        self.endpoint = endpoint
+        self.hostname = None
+        self.connected = False
+        self.bytes_received = 0
+        self.latest = None
+        self.history = MetricHistory(("cpu", "ram", "network"), history_points)
+        self.mailbox = Mailbox()
+        # Receive rate, recomputed at most once a second by receive_rate()
+        self.rate = 0.0
+        self.rate_bytes = 0
+        self.rate_time = time.monotonic()
+
+    @property
+    def label(self):
+        state = "" if self.connected else " (down)"
+        return f"{self.hostname or '?'} ({self.endpoint}){state}"
+
+    def receive_rate(self):
+        # Bytes per second from this agent, the wire cost of following it
+        now = time.monotonic()
+        elapsed = now - self.rate_time
+        if elapsed >= 1.0:
+            self.rate = (self.bytes_received - self.rate_bytes) / elapsed
+            self.rate_bytes = self.bytes_received
+            self.rate_time = now
+        return self.rate
+
+
+class Aggregator:
+    # Follows many agents from one asyncio loop on a background thread,
+    # keeping a ring-buffer history and a latest-sample mailbox per host
+    def __init__(self, endpoints, history_points=60, on_sample=None):
+        self.hosts = {endpoint: RemoteHost(endpoint, history_points) for endpoint in endpoints}
+        self.on_sample = on_sample
+        self.loop = None
+        self.thread = None
+
+    async def follow(self, host):
+        delay = 1.0
+        while True:
+            try:
+                address, port = parse_endpoint(host.endpoint)
+                if address is None:
+                    reader, writer = await asyncio.open_unix_connection(port)
+                else:
+                    reader, writer = await asyncio.open_connection(address, port)
+                try:
+                    host.hostname = await read_hello(reader)
+                    host.connected = True
+                    delay = 1.0
+                    decoder = FrameDecoder()
+                    while True:
+                        payload = await read_frame(reader)
+                        host.bytes_received += len(payload) + 1
+                        sample = decoder.decode(payload)
+                        host.latest = sample
+                        host.history.append(sample.timestamp, (sample.cpu_percent, sample.ram_percent, sample.net_percent))
+                        host.mailbox.put((sample, None))
+                        if self.on_sample is not None:
+                            self.on_sample(host, sample)
+                finally:
+                    writer.close()
+            except (OSError, EOFError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+                # ValueError: corrupt frame; drop this connection only
+                pass
+            # Reconnect with backoff
+            host.connected = False
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30.0)
+
+    async def supervise(self, host):
+        # Restarts follow() after anything unexpected, so one host failing
+        # never cancels the others in run()
+        while True:
+            try:
+                await self.follow(host)
+            except Exception as exc:
+                print(f"gearsmap: {host.endpoint}: {exc!r}", file=sys.stderr)
+                host.connected = False
+                await asyncio.sleep(5.0)
+
+    async def run(self):
+        await asyncio.gather(*(self.supervise(host) for host in self.hosts.values()))
+
+    def start(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_until_complete, args=(self.run(),), daemon=True)
+        self.thread.start()
+
+
+def run_dashboard_headless(endpoints, history_points=60):
+    # Text dashboard: print every sample from every agent
+    from sampler import format_sample
+
+    def print_sample(host, sample):
+        print(f"[{host.label}] {format_sample(sample)}", flush=True)
+
+    aggregator = Aggregator(endpoints, history_points, on_sample=print_sample)
+    try:
+        asyncio.run(aggregator.run())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,173 @@
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from recorder import FIELDS, RecordingReader
+from sampler import Sample, format_sample
+
+# Records converted per step when streaming a recording; bounds memory
+# use no matter how long the recording is
+CHUNK_RECORDS = 65536
+
+
+def parse_time(text):
+    # Epoch seconds or a local ISO date/time ("2024-05-01", "2024-05-01 13:30")
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return datetime.fromisoformat(text).timestamp()
+
+
+def iter_chunks(reader, start=None, end=None, chunk=CHUNK_RECORDS):
+    # Memory-mapped record slices covering [start, end); nothing is copied
+    # until a consumer reads a slice
+    for records in reader.segments(start, end):
+        for i in range(0, len(records), chunk):
+            yield records[i:i + chunk]
+
+
+def iter_samples(reader, start=None, end=None, chunk=CHUNK_RECORDS):
+    # Recorded rows as Sample tuples, the same shape update_data produces
+    for records in iter_chunks(reader, start, end, chunk):
+        columns = [(records["timestamp"] / 1e9).tolist()]
+        columns += [records[name].astype(np.float64).tolist() for name in FIELDS]
+        for row in zip(*columns):
+            yield Sample(*row)
+
+
+def csv_chunks(reader, start=None, end=None, chunk=CHUNK_RECORDS):
+    # CSV text, one string per chunk of records, header first
+    yield ",".join(Sample._fields) + "\n"
+    for records in iter_chunks(reader, start, end, chunk):
+        columns = [[f"{value:.3f}" for value in (records["timestamp"] / 1e9).tolist()]]
+        # 9 significant digits round-trip the recorded float32 values
+        columns += [[f"{value:.9g}" for value in records[name].tolist()] for name in FIELDS]
+        yield "".join(",".join(row) + "\n" for row in zip(*columns))
+
+
+def export_csv(reader, path, start=None, end=None):
+    rows = -1
+    with open(path, "w", newline="") as f:
+        for text in csv_chunks(reader, start, end):
+            f.write(text)
+            rows += text.count("\n")
+    return rows
+
+
+def export_parquet(reader, path, start=None, end=None):
+    # One Parquet row group per chunk; pyarrow is only needed for this
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([("timestamp", pa.timestamp("ns", tz="UTC"))] + [(name, pa.float32()) for name in FIELDS])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for records in iter_chunks(reader, start, end):
+            arrays = [pa.array(records["timestamp"], type=schema.field("timestamp").type)]
+            arrays += [pa.array(records[name]) for name in FIELDS]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(records)
+    return rows
+
+
+EXPORTERS = {".csv": export_csv, ".parquet": export_parquet}
+
+
+class Replayer:
+    # Plays a recording back against the wall clock at `speed` times real
+    # time. Samples are pulled lazily from the memory-mapped segments, so
+    # seeking and long recordings cost no more memory than live sampling.
+    def __init__(self, directory, start=None, end=None, speed=1.0):
+        self.reader = RecordingReader(directory)
+        time_range = self.reader.time_range()
+        if time_range is None:
+            raise ValueError(f"no recorded samples in {directory}")
+        self.first = max(time_range[0], start) if start is not None else time_range[0]
+        self.last = min(time_range[1], end) if end is not None else time_range[1]
+        if self.first > self.last:
+            raise ValueError("no recorded samples in range")
+        self.speed = speed
+        self.playing = True
+        self.seek(self.first)
+
+    def seek(self, position):
+        self.position = min(max(position, self.first), self.last)
+        self.samples = iter_samples(self.reader, self.position, self.last + 1e-3)
+        self.pending = next(self.samples, None)
+        self.anchor = time.monotonic()
+        self.anchor_position = self.position
+
+    def set_speed(self, speed):
+        self.rebase()
+        self.speed = speed
+
+    def pause(self):
+        self.rebase()
+        self.playing = False
+
+    def play(self):
+        if self.pending is None:
+            # Finished: start over
+            self.seek(self.first)
+        self.anchor = time.monotonic()
+        self.anchor_position = self.position
+        self.playing = True
+
+    def rebase(self):
+        # Re-base the clock at the current position without moving it
+        self.position = self.current_position()
+        self.anchor = time.monotonic()
+        self.anchor_position = self.position
+
+    def current_position(self):
+        if not self.playing:
+            return self.position
+        elapsed = time.monotonic() - self.anchor
+        return min(self.anchor_position + elapsed * self.speed, self.last)
+
+    def due(self):
+        # Samples recorded up to the current replay position
+        self.position = self.current_position()
+        while self.pending is not None and self.pending.timestamp <= self.position:
+            yield self.pending
+            self.pending = next(self.samples, None)
+        if self.pending is None:
+            self.playing = False
+
+    def before(self, span):
+        # Samples in the `span` seconds before the current position, for
+        # refilling the chart after a seek
+        return iter_samples(self.reader, max(self.first, self.position - span), self.position)
+
+
+def run_replay_headless(replayer, count=None):
+    # Prints recorded samples at replay speed, like headless live mode
+    shown = 0
+    try:
+        while replayer.playing:
+            for sample in replayer.due():
+                print(format_sample(sample), flush=True)
+                shown += 1
+                if count is not None and shown >= count:
+                    return
+            if replayer.pending is not None:
+                wait = (replayer.pending.timestamp - replayer.position) / replayer.speed
+                time.sleep(min(max(wait, 0.001), 1.0))
+    except KeyboardInterrupt:
+        pass
+
+
+def run_export(directory, path, start=None, end=None):
+    for suffix, export in EXPORTERS.items():
+        if path.endswith(suffix):
+            break
+    else:
+        print(f"gearsmap: cannot export to {path}: use one of {', '.join(EXPORTERS)}", file=sys.stderr)
+        return 2
+    rows = export(RecordingReader(directory), path, start, end)
+    print(f"gearsmap: exported {rows} samples to {path}", file=sys.stderr)
+    return 0
@@ -0,0 +1,204 @@
+import math
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime
+
+import psutil
+
+from profiling import NULL_PROFILER
+from scheduler import Scheduler
+
+# Seconds between reads of slowly changing values (CPU frequency, link speeds)
+SLOW_INTERVAL = 5.0
+
+# Capacity assumed for an interface that reports no link speed (Wi-Fi,
+# VPN tunnels, some virtual NICs): 1 MB/s counts as 100%
+FALLBACK_LINK_KB_S = 1024
+
+# One reading of every metric shown on the dashboard
+Sample = namedtuple("Sample", [
+    "timestamp",
+    "cpu_percent", "cpu_freq_mhz",
+    "ram_percent", "ram_used_gb", "ram_total_gb",
+    "recv_kb_s", "sent_kb_s", "total_kb_s", "net_percent",
+    "uptime_seconds",
+])
+
+
+def format_freq(freq_mhz):
+    if math.isnan(freq_mhz):
+        return "N/A"
+    return f"{freq_mhz:.0f} MHz"
+
+
+def format_rate(kb_s):
+    # Format as MB/s if over 1000 KB/s
+    if kb_s < 1000:
+        return f"{kb_s:.1f} KB/s"
+    return f"{kb_s/1024:.2f} MB/s"
+
+
+def format_uptime(uptime_seconds):
+    days, remainder = divmod(int(uptime_seconds), 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{days}d {hours}h {minutes}m"
+
+
+class Sampler:
+    def __init__(self, profiler=NULL_PROFILER):
+        self.profiler = profiler
+        # Previous per-NIC counters for calculation, timed on the monotonic
+        # clock so NTP steps cannot distort the rate
+        self.prev_nics = psutil.net_io_counters(pernic=True)
+        self.prev_net_time = time.monotonic()
+
+        # Boot time never changes, read it once
+        self.boot_time = psutil.boot_time()
+        self.refresh_slow()
+
+    def refresh_slow(self):
+        # Slow collector, scheduled at SLOW_INTERVAL rather than every sample
+        with self.profiler.stage("psutil.cpu_freq"):
+            cpu_freq = psutil.cpu_freq()
+        self.cpu_freq_mhz = cpu_freq.current if cpu_freq else math.nan
+
+        # Capacity in KB/s per direction of each non-loopback link that is
+        # up; speed is in Mbit/s, 0 when the driver does not report one
+        with self.profiler.stage("psutil.net_if_stats"):
+            stats = psutil.net_if_stats()
+        self.links = {name: nic.speed * 1e6 / 8 / 1024 if nic.speed > 0 else FALLBACK_LINK_KB_S
+                      for name, nic in stats.items()
+                      if nic.isup and name != "lo" and "loopback" not in getattr(nic, "flags", "")}
+
+    def sample(self):
+        profiler = self.profiler
+        # CPU data
+        with profiler.stage("psutil.cpu_percent"):
+            cpu_percent = psutil.cpu_percent()
+
+        # RAM data
+        with profiler.stage("psutil.virtual_memory"):
+            ram = psutil.virtual_memory()
+        ram_used_gb = ram.used / (1024**3)
+        ram_total_gb = ram.total / (1024**3)
+
+        # Network data
+        with profiler.stage("psutil.net_io_counters"):
+            nics = psutil.net_io_counters(pernic=True)
+        current_mono = time.monotonic()
+        current_time = time.time()
+
+        # Calculate network throughput in KB/s over all interfaces
+        time_diff = current_mono - self.prev_net_time
+        prev_nics = self.prev_nics
+        recv_bytes = sum(nic.bytes_recv for nic in nics.values()) - sum(nic.bytes_recv for nic in prev_nics.values())
+        sent_bytes = sum(nic.bytes_sent for nic in nics.values()) - sum(nic.bytes_sent for nic in prev_nics.values())
+
+        if time_diff > 0:
+            recv_kb_s = (recv_bytes / time_diff) / 1024
+            sent_kb_s = (sent_bytes / time_diff) / 1024
+        else:
+            recv_kb_s = sent_kb_s = 0.0
+        total_kb_s = recv_kb_s + sent_kb_s
+
+        # Network usage as the busiest link's share of its own capacity.
+        # Links are full duplex, so the busier direction is what saturates.
+        # Loopback stays out; taking the maximum rather than a sum keeps idle
+        # veths, and a bond next to its members, from diluting the figure.
+        # With no interface up at all fall back to the old fixed scale.
+        if self.links:
+            busiest = 0.0
+            if time_diff > 0:
+                for name, link_kb_s in self.links.items():
+                    nic, prev = nics.get(name), prev_nics.get(name)
+                    if nic is None or prev is None:
+                        continue
+                    busiest_bytes = max(nic.bytes_recv - prev.bytes_recv, nic.bytes_sent - prev.bytes_sent)
+                    busiest = max(busiest, busiest_bytes / time_diff / 1024 / link_kb_s)
+            net_percent = min(100, busiest * 100)
+        else:
+            net_percent = min(100, total_kb_s / FALLBACK_LINK_KB_S * 100)
+
+        self.prev_nics = nics
+        self.prev_net_time = current_mono
+
+        # Uptime
+        uptime_seconds = current_time - self.boot_time
+
+        return Sample(
+            current_time,
+            cpu_percent, self.cpu_freq_mhz,
+            ram.percent, ram_used_gb, ram_total_gb,
+            recv_kb_s, sent_kb_s, total_kb_s, net_percent,
+            uptime_seconds,
+        )
+
+
+def format_sample(sample):
+    stamp = datetime.fromtimestamp(sample.timestamp).strftime("%Y-%m-%d %H:%M:%S")
+    return (
+        f"{stamp}  "
+        f"CPU {sample.cpu_percent:5.1f}% {format_freq(sample.cpu_freq_mhz)}  "
+        f"RAM {sample.ram_percent:5.1f}% {sample.ram_used_gb:.1f}/{sample.ram_total_gb:.1f} GB  "
+        f"NET ↑ {format_rate(sample.sent_kb_s)} ↓ {format_rate(sample.recv_kb_s)}  "
+        f"Uptime {format_uptime(sample.uptime_seconds)}"
+    )
+
+
+def run_headless(refresh_rate=1.0, count=None, recorder=None, detailed=False, exporter=None,
+                 alert_engine=None, profiler=NULL_PROFILER):
+    # Same sampling loop as the GUI, printing one line per sample
+    sampler = Sampler(profiler)
+    collector = None
+    if detailed or exporter is not None or (alert_engine is not None and alert_engine.needs_details):
+        # numpy-backed, only loaded when asked for
+        from collector import DetailCollector, format_details
+        collector = DetailCollector(profiler)
+    registry = None
+    if alert_engine is not None and alert_engine.needs_processes:
+        # Process rules read the registry's background snapshot
+        from processes import ProcessRegistry
+        registry = ProcessRegistry(profiler=profiler)
+        registry.start()
+    taken = 0
+
+    def report_missed(task, missed):
+        print(f"gearsmap: {task.name} missed {missed} deadline(s), {task.missed} in total", file=sys.stderr)
+
+    def tick():
+        nonlocal taken
+        with profiler.stage("tick"):
+            sample = sampler.sample()
+            if recorder is not None:
+                with profiler.stage("tick.record"):
+                    recorder.append(sample)
+            details = collector.collect() if collector is not None else None
+            if exporter is not None:
+                with profiler.stage("tick.exporter"):
+                    exporter.update(sample, details)
+            if alert_engine is not None:
+                with profiler.stage("tick.alerts"):
+                    alert_engine.evaluate(sample, details, registry.snapshot if registry is not None else None)
+        print(format_sample(sample), flush=True)
+        if detailed:
+            print("    " + format_details(details), flush=True)
+        taken += 1
+        if count is not None and taken >= count:
+            scheduler.stop()
+
+    scheduler = Scheduler(on_missed=report_missed)
+    scheduler.add("sample", refresh_rate, tick)
+    scheduler.add("slow", SLOW_INTERVAL, sampler.refresh_slow)
+    try:
+        scheduler.run()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if registry is not None:
+            registry.stop()
+        if profiler.enabled:
+            print(profiler.report(), file=sys.stderr)
@@ -0,0 +1,102 @@
+import sys
+import threading
+import time
+
+
+class Task:
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_due = None
+        self.runs = 0
+        self.missed = 0
+
+
+class Scheduler:
+    # Fixed-cadence scheduler on the monotonic clock. Each task keeps its
+    # own deadline, advanced by exactly one interval per run, so the time
+    # a task takes does not push later runs back. Deadlines that have
+    # already passed are counted as missed and skipped rather than run
+    # back to back. A task that raises is reported and keeps its schedule.
+    # stop() wakes the loop immediately.
+    def __init__(self, on_missed=None):
+        self.tasks = []
+        self.on_missed = on_missed
+        self.wake = threading.Event()
+        self.stopped = False
+
+    def add(self, name, interval, func):
+        if interval <= 0:
+            raise ValueError(f"interval for {name} must be positive, not {interval}")
+        task = Task(name, interval, func)
+        self.tasks.append(task)
+        return task
+
+    def set_interval(self, task, interval):
+        # Takes effect right away: the next run is due one new interval after the last one
+        if interval <= 0:
+            raise ValueError(f"interval for {task.name} must be positive, not {interval}")
+        if task.next_due is not None:
+            task.next_due += interval - task.interval
+        task.interval = interval
+        self.wake.set()
+
+    def run(self):
+        start = time.monotonic()
+        for task in self.tasks:
+            task.next_due = start
+        while not self.stopped:
+            now = time.monotonic()
+            for task in self.tasks:
+                if self.stopped or task.next_due > now:
+                    continue
+                try:
+                    task.func()
+                except Exception as e:
+                    # One failing run (a full disk under the recorder, say)
+                    # must not end the loop and every other task with it
+                    print(f"gearsmap: {task.name} failed: {e!r}", file=sys.stderr, flush=True)
+                task.runs += 1
+                task.next_due += task.interval
+
+                # Missed deadlines: keep the original phase instead of catching up
+                now = time.monotonic()
+                if task.next_due <= now:
+                    missed = int((now - task.next_due) // task.interval) + 1
+                    task.next_due += missed * task.interval
+                    task.missed += missed
+                    if self.on_missed is not None:
+                        self.on_missed(task, missed)
+
+            if self.stopped or not self.tasks:
+                break
+            timeout = min(task.next_due for task in self.tasks) - time.monotonic()
+            if timeout > 0:
+                self.wake.wait(timeout)
+                self.wake.clear()
+
+    def stop(self):
+        self.stopped = True
+        self.wake.set()
+
+
+class Mailbox:
+    # Single-slot handoff from a producer thread to a consumer that polls
+    # at its own rate. put() overwrites an unread value, so a slow consumer
+    # only ever sees the latest one and nothing piles up.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.dropped = 0
+
+    def put(self, value):
+        with self.lock:
+            if self.value is not None:
+                self.dropped += 1
+            self.value = value
+
+    def take(self):
+        with self.lock:
+            value, self.value = self.value, None
+        return value